@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compares the base64 cache key builder opps used up to 0.1.7 with the
+hashed one in opps.core.cache (generation lookups left out, both build
+keys from the same components)
+
+    $ DJANGO_SETTINGS_MODULE=tests.settings python benchmarks/cache_key.py
+"""
+import timeit
+from base64 import b64encode
+
+from django.conf import settings
+
+from opps.core.cache import make_key
+
+
+SITE = 'example.com'
+TABLE = 'articles_post'
+SLUGS = {
+    'short': 'news',
+    'long': '/'.join(
+        ['a-very-long-channel-slug-for-an-editorial-section'] * 5),
+}
+
+
+def b64_key(_type, table, site, channel_long_slug):
+    return b64encode((u'{}:{}:{}:{}:{}'.format(
+        _type,
+        settings.OPPS_CACHE_PREFIX,
+        table,
+        site,
+        channel_long_slug)).replace(' ', '').encode('utf-8'))
+
+
+def hashed_key(_type, table, site, channel_long_slug):
+    return make_key(u'{}:{}:{}'.format(settings.OPPS_CACHE_PREFIX, _type,
+                                       table),
+                    site, channel_long_slug, 1, 1)
+
+
+def main(number=100000):
+    for name, slug in sorted(SLUGS.items()):
+        for builder in (b64_key, hashed_key):
+            seconds = timeit.timeit(
+                lambda: builder('list', TABLE, SITE, slug), number=number)
+            print(u'{:<5} {:<10} {:>8.0f} keys/s  {:>4} bytes'.format(
+                name, builder.__name__, number / seconds,
+                len(builder('list', TABLE, SITE, slug))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Prints the EXPLAIN plans of the hot publishable queries with the composite
+indexes of articles 0014 / channels 0006, then without them (dropped and
+recreated by the script), on the database of your project settings.
+
+Indexes are dropped while it runs: point the settings at a test database
+or a copy of production, never at a live one. The script refuses to run
+without ``--scratch-database``:
+
+    $ DJANGO_SETTINGS_MODULE=yourproject.settings \\
+        python benchmarks/explain_indexes.py --scratch-database \\
+        [site_id] [channel_long_slug]
+"""
+import sys
+import timeit
+
+from django.db import connection
+from django.utils import timezone
+from south.db import db
+
+from opps.articles.models import Article, Post, ArticleBoxArticles
+from opps.channels.models import Channel
+
+
+INDEXES = (
+    (Article, ['site_id', 'channel_long_slug', 'published', 'date_available']),
+    (Article, ['site_id', 'child_class', 'published', 'date_available']),
+    (ArticleBoxArticles, ['articlebox_id', 'order', 'date_available']),
+    (Channel, ['site_id', 'long_slug', 'published']),
+)
+
+
+def queries(site_id, long_slug):
+    now = timezone.now()
+    yield 'channel list', Post.objects.filter(
+        site=site_id, channel_long_slug__in=[long_slug],
+        date_available__lte=now, published=True)[:10]
+    yield 'child class list', Article.objects.filter(
+        site=site_id, child_class='Post', date_available__lte=now,
+        published=True)[:10]
+    yield 'box articles', ArticleBoxArticles.objects.filter(
+        articlebox__isnull=False, date_available__lte=now).order_by(
+        'articlebox', 'order')[:10]
+    yield 'channel', Channel.objects.filter(
+        site=site_id, long_slug=long_slug, published=True)
+
+
+def explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' \
+        else 'EXPLAIN '
+    cursor = connection.cursor()
+    cursor.execute(prefix + sql, params)
+    return cursor.fetchall()
+
+
+def report(title, site_id, long_slug):
+    print(u'=== {}'.format(title))
+    for name, queryset in queries(site_id, long_slug):
+        seconds = timeit.timeit(lambda: list(queryset._clone()), number=20)
+        print(u'--- {} ({:.2f} ms)'.format(name, seconds / 20 * 1000))
+        for row in explain(queryset):
+            print(u'    {}'.format(row))
+
+
+def main(site_id=1, long_slug='home'):
+    report('with composite indexes', site_id, long_slug)
+    for model, columns in INDEXES:
+        db.delete_index(model._meta.db_table, columns)
+    try:
+        report('without composite indexes', site_id, long_slug)
+    finally:
+        for model, columns in INDEXES:
+            db.create_index(model._meta.db_table, columns)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if '--scratch-database' not in args:
+        sys.exit(u'explain_indexes drops indexes of {}, run it with '
+                 u'--scratch-database on a test or copied database '
+                 u'only'.format(connection.settings_dict['NAME']))
+    args.remove('--scratch-database')
+    main(*args)
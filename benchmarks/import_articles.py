@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Articles/second of the bulk importer (opps.articles.importer) against one
+Post.objects.create() per article, on the database of your project
+settings. Posts are created in the given channel and deleted afterwards.
+
+    $ DJANGO_SETTINGS_MODULE=yourproject.settings \\
+        python benchmarks/import_articles.py [number] [channel_long_slug]
+"""
+import sys
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from opps.articles.importer import BulkImporter
+from opps.articles.models import Article, Post
+from opps.channels.models import Channel
+from opps.core import tasks
+
+
+def records(number, long_slug, prefix):
+    for i in range(number):
+        yield {
+            'channel': long_slug,
+            'title': u'Benchmark {}'.format(i),
+            'slug': u'{}-{}'.format(prefix, i),
+            'content': u'<p>content</p>' * 20,
+            'tags': u'benchmark,tag {}'.format(i % 50),
+            # short URLs are left out of both runs
+            'short_url': u'http://example.com/{}'.format(i),
+        }
+
+
+def one_by_one(number, channel, user):
+    prefix = uuid.uuid4().hex[:8]
+    for record in records(number, channel.long_slug, prefix):
+        post = Post.objects.create(
+            site=channel.site, user=user, channel=channel,
+            title=record['title'], slug=record['slug'],
+            content=record['content'], short_url=record['short_url'],
+            published=True, date_available=timezone.now())
+        post.tags.add(*record['tags'].split(','))
+    return prefix
+
+
+def bulk(number, channel, user):
+    prefix = uuid.uuid4().hex[:8]
+    BulkImporter(site=channel.site, user=user).run(
+        records(number, channel.long_slug, prefix))
+    tasks.join()
+    return prefix
+
+
+def main(number=1000, long_slug='home'):
+    number = int(number)
+    channel = Channel.objects.get(long_slug=long_slug)
+    user = get_user_model().objects.filter(is_superuser=True)[0]
+
+    for name, run in (('save() per article', one_by_one),
+                      ('BulkImporter', bulk)):
+        start = time.time()
+        prefix = run(number, channel, user)
+        seconds = time.time() - start
+        print(u'{:<20} {:>8.0f} articles/s'.format(name, number / seconds))
+        Article.objects.filter(slug__startswith=prefix).delete()
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
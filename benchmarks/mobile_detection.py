@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+User agent classification of MobileDetectionMiddleware: the three regexes
+opps used up to 0.1.7, the combined pattern and the combined pattern
+behind the LRU of decisions, over a corpus of real user agents repeated
+the way production traffic repeats them
+
+    $ DJANGO_SETTINGS_MODULE=tests.settings \\
+        python benchmarks/mobile_detection.py
+"""
+import re
+import timeit
+
+from opps.core.middleware import MobileDetectionMiddleware
+
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/537.36 (KHTML, like '
+    'Gecko) Chrome/28.0.1500.72 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 6.1; WOW64; rv:22.0) Gecko/20100101 '
+    'Firefox/22.0',
+    'Mozilla/5.0 (compatible; MSIE 10.0; Windows NT 6.1; Trident/6.0)',
+    'Mozilla/4.0 (compatible; MSIE 8.0; Windows NT 5.1; Trident/4.0; .NET '
+    'CLR 2.0.50727)',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_8_4) AppleWebKit/536.30.1 '
+    '(KHTML, like Gecko) Version/6.0.5 Safari/536.30.1',
+    'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:22.0) Gecko/20100101 '
+    'Firefox/22.0',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 6_1_4 like Mac OS X) '
+    'AppleWebKit/536.26 (KHTML, like Gecko) Version/6.0 Mobile/10B350 '
+    'Safari/8536.25',
+    'Mozilla/5.0 (iPad; CPU OS 6_1_3 like Mac OS X) AppleWebKit/536.26 '
+    '(KHTML, like Gecko) Version/6.0 Mobile/10B329 Safari/8536.25',
+    'Mozilla/5.0 (Linux; U; Android 4.1.2; pt-br; GT-I9300 Build/JZO54K) '
+    'AppleWebKit/534.30 (KHTML, like Gecko) Version/4.0 Mobile '
+    'Safari/534.30',
+    'Mozilla/5.0 (Linux; Android 4.2.2; Nexus 7 Build/JDQ39) '
+    'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/28.0.1500.64 '
+    'Safari/537.36',
+    'Opera/9.80 (J2ME/MIDP; Opera Mini/9.80 (S60; SymbOS; Opera '
+    'Mobi/23.348; U; en) Presto/2.5.25 Version/10.54',
+    'Nokia6300/2.0 (05.00) Profile/MIDP-2.0 Configuration/CLDC-1.1',
+    'SAMSUNG-GT-S5230/S5230XEIH1 NetFront/3.5 Profile/MIDP-2.1 '
+    'Configuration/CLDC-1.1',
+    'BlackBerry9700/5.0.0.862 Profile/MIDP-2.1 Configuration/CLDC-1.1 '
+    'VendorID/331',
+    'Mozilla/5.0 (compatible; MSIE 9.0; Windows Phone OS 7.5; Trident/5.0; '
+    'IEMobile/9.0; NOKIA; Lumia 800)',
+    'Mozilla/5.0 (compatible; Googlebot/2.1; '
+    '+http://www.google.com/bot.html)',
+    'facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.'
+    'php)',
+    'curl/7.29.0',
+]
+
+
+class ThreeRegexes(object):
+    # MobileDetectionMiddleware up to 0.1.7
+    def __init__(self):
+        cls = MobileDetectionMiddleware
+        self.match = re.compile(r'^(?:%s)' % '|'.join(
+            cls.user_agents_test_match), re.IGNORECASE)
+        self.search = re.compile(cls.user_agents_test_search, re.IGNORECASE)
+        self.exception = re.compile(cls.user_agents_exception_search,
+                                    re.IGNORECASE)
+
+    def is_mobile_agent(self, user_agent):
+        return bool(self.search.search(user_agent) and
+                    not self.exception.search(user_agent) or
+                    self.match.match(user_agent))
+
+
+class Combined(object):
+    def is_mobile_agent(self, user_agent):
+        return bool(MobileDetectionMiddleware.user_agents_regex.match(
+            user_agent))
+
+
+def main(rounds=20):
+    # a day of traffic: the same agents over and over
+    corpus = USER_AGENTS * 50
+    middleware = MobileDetectionMiddleware()
+    detectors = [('three regexes', ThreeRegexes()),
+                 ('combined', Combined()),
+                 ('combined + LRU', middleware)]
+
+    for name, detector in detectors:
+        decisions = [detector.is_mobile_agent(ua) for ua in USER_AGENTS]
+        assert decisions == [Combined().is_mobile_agent(ua)
+                             for ua in USER_AGENTS]
+
+        seconds = timeit.timeit(
+            lambda: [detector.is_mobile_agent(ua) for ua in corpus],
+            number=rounds)
+        print(u'{:<15} {:>10.0f} agents/s'.format(
+            name, rounds * len(corpus) / seconds))
+
+    print(u'LRU hits {} misses {}'.format(middleware.decisions.hits,
+                                          middleware.decisions.misses))
+
+
+if __name__ == '__main__':
+    main()
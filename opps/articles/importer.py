@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Bulk import of posts (wire services, migrations from other systems).
+
+Records are dicts, streamed from JSON (one object per line), CSV or XML by
+``read_records``::
+
+    {"channel": "news/world", "title": "...", "slug": "...",
+     "content": "...", "headline": "...", "hat": "...",
+     "date_available": "2013-06-01T10:00:00", "published": true,
+     "tags": "tag 1,tag 2", "sources": "source-slug", "short_url": "...",
+     "main_image": 1, "images": "1,2"}
+
+Only ``channel`` (long slug), ``title`` and ``content`` are required. Rows
+are written ``batch_size`` at a time, with a handful of queries per batch
+instead of a full ``save()`` per post. Search indexing is left to
+``update_index`` and short URLs to the background queue.
+"""
+import csv
+import json
+from collections import defaultdict
+from itertools import islice
+from xml.etree.cElementTree import iterparse
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.redirects.models import Redirect
+from django.contrib.sites.models import Site
+from django.db import connections, transaction
+from django.template.defaultfilters import slugify
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from taggit.models import Tag, TaggedItem
+
+from opps.articles.models import Article, Post, ArticleSource, ArticleImage
+from opps.articles.signals import invalidate_channels, shorturl_task
+from opps.channels.models import Channel
+from opps.core.paginator import update_count
+from opps.core.tasks import enqueue
+from opps.images.models import Image
+from opps.sources.models import Source
+
+
+FORMATS = ('json', 'csv', 'xml')
+
+
+def read_records(stream, format='json'):
+    """
+    Yields the records of ``stream`` one at a time, the input is never
+    loaded whole
+    """
+    if format == 'json':
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    elif format == 'csv':
+        for row in csv.DictReader(stream):
+            yield dict((key, value.decode('utf-8'))
+                       for key, value in row.items() if value)
+    elif format == 'xml':
+        # <articles><article><title>...</title>...</article></articles>
+        for event, element in iterparse(stream):
+            if element.tag == 'article':
+                yield dict((child.tag, child.text or u'')
+                           for child in element)
+                element.clear()
+    else:
+        raise ValueError(u"Unknown format: {}".format(format))
+
+
+def split(value):
+    """
+    list fields come as lists (JSON) or comma separated text
+    """
+    if not value:
+        return []
+    if isinstance(value, basestring):
+        value = value.split(',')
+    return [item.strip() for item in value
+            if item and unicode(item).strip()]
+
+
+def to_bool(value):
+    if isinstance(value, basestring):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y')
+    return bool(value)
+
+
+class BulkImporter(object):
+    """
+    Imports posts ``batch_size`` at a time, one transaction per batch.
+    Invalid records (unknown channel, missing fields) and records whose URL
+    is already taken are skipped and counted in ``skipped``.
+    """
+
+    def __init__(self, site=None, user=None, batch_size=500,
+                 using='default'):
+        self.site = site or Site.objects.get(pk=settings.SITE_ID)
+        self.user = user
+        self.batch_size = batch_size
+        self.using = using
+        self.created = 0
+        self.skipped = 0
+        self.short_urls = []
+        self.channels_touched = set()
+        self.counts = defaultdict(int)
+
+        # one query for every channel of the site, by long_slug
+        self.channels = dict(
+            (channel.long_slug, channel)
+            for channel in Channel.objects.using(using).filter(
+                site=self.site))
+
+    def run(self, records):
+        """
+        Imports every record of the iterable ``records``, then drops the
+        caches of the channels touched. Returns the number of posts
+        created by this run, ``created`` adds up every run.
+        """
+        created = self.created
+        records = iter(records)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+            with transaction.commit_on_success(using=self.using):
+                self.import_batch(batch)
+        self.finish()
+        return self.created - created
+
+    def build(self, record, now):
+        channel = self.channels.get(record.get('channel'))
+        title = record.get('title')
+        if not channel or not title or 'content' not in record:
+            return None
+
+        date_available = record.get('date_available') or now
+        if isinstance(date_available, basestring):
+            date_available = parse_datetime(date_available)
+            if date_available is None:
+                return None
+        if settings.USE_TZ and timezone.is_naive(date_available):
+            date_available = timezone.make_aware(
+                date_available, timezone.get_default_timezone())
+        published = to_bool(record.get('published', True))
+
+        return Article(
+            site=self.site,
+            user=self.user,
+            title=title,
+            slug=record.get('slug') or slugify(title)[:150],
+            headline=record.get('headline') or u'',
+            hat=record.get('hat'),
+            short_title=record.get('short_title'),
+            short_url=record.get('short_url'),
+            channel=channel,
+            channel_name=channel.name,
+            channel_long_slug=channel.long_slug,
+            child_class=Post.__name__,
+            child_app_label=Post._meta.app_label,
+            main_image_id=record.get('main_image') or None,
+            date_available=date_available,
+            published=published,
+            live=published and date_available <= now,
+            date_insert=now,
+            date_update=now)
+
+    def import_batch(self, records):
+        now = timezone.now()
+        pending = []
+        seen = set()
+        for record in records:
+            article = self.build(record, now)
+            if article is None or (article.channel_long_slug,
+                                   article.slug) in seen:
+                self.skipped += 1
+                continue
+            seen.add((article.channel_long_slug, article.slug))
+            pending.append((article, record))
+
+        pending = self.exclude_missing_images(pending)
+        pending = self.exclude_taken(pending)
+        if not pending:
+            return
+
+        # parent rows first, bulk_create doesn't return the ids
+        Article.objects.using(self.using).bulk_create(
+            [article for article, record in pending])
+        ids = dict(((long_slug, slug), pk) for long_slug, slug, pk in
+                   Article.objects.using(self.using).filter(
+                       site=self.site, child_class=Post.__name__,
+                       slug__in=[a.slug for a, r in pending]).values_list(
+                       'channel_long_slug', 'slug', 'pk'))
+        for article, record in pending:
+            article.pk = ids[(article.channel_long_slug, article.slug)]
+
+        self.insert_posts(pending)
+        self.attach_tags(pending)
+        self.attach_sources(pending)
+        self.attach_images(pending)
+
+        for article, record in pending:
+            if not article.short_url:
+                self.short_urls.append((article.pk,
+                                        article.get_http_absolute_url()))
+            self.channels_touched.add(article.channel)
+            if article.live:
+                self.counts[article.channel_long_slug] += 1
+        self.created += len(pending)
+
+    def image_ids(self, article, record):
+        """
+        ids of the main image and gallery of a record, None when one of
+        them is not a number
+        """
+        try:
+            ids = [int(image) for image in split(record.get('images'))]
+            if article.main_image_id:
+                ids.append(int(article.main_image_id))
+        except (TypeError, ValueError):
+            return None
+        return ids
+
+    def exclude_missing_images(self, pending):
+        """
+        one query for the images referenced by the batch, records pointing
+        to an image that doesn't exist are skipped
+        """
+        wanted = set()
+        for article, record in pending:
+            wanted.update(self.image_ids(article, record) or [])
+        found = set(Image.objects.using(self.using).filter(
+            pk__in=wanted).values_list('pk', flat=True)) if wanted else set()
+
+        result = []
+        for article, record in pending:
+            ids = self.image_ids(article, record)
+            if ids is None or not found.issuperset(ids):
+                self.skipped += 1
+                continue
+            result.append((article, record))
+        return result
+
+    def exclude_taken(self, pending):
+        """
+        one query for URLs already used by a post, one for redirects
+        """
+        taken = set(Article.objects.using(self.using).filter(
+            site=self.site, child_class=Post.__name__,
+            slug__in=[a.slug for a, r in pending]).values_list(
+            'channel_long_slug', 'slug'))
+        redirects = set(Redirect.objects.using(self.using).filter(
+            site=self.site,
+            old_path__in=[a.get_absolute_url() for a, r in pending]
+        ).values_list('old_path', flat=True))
+
+        result = []
+        for article, record in pending:
+            if (article.channel_long_slug, article.slug) in taken or \
+               article.get_absolute_url() in redirects:
+                self.skipped += 1
+                continue
+            result.append((article, record))
+        return result
+
+    def insert_posts(self, pending):
+        """
+        child rows of the multi-table inheritance, bulk_create can't
+        insert them (Django 1.5), one executemany instead
+        """
+        qn = connections[self.using].ops.quote_name
+        sql = u'INSERT INTO {} ({}, {}) VALUES (%s, %s)'.format(
+            qn(Post._meta.db_table),
+            qn(Post._meta.get_field('article_ptr').column),
+            qn(Post._meta.get_field('content').column))
+        cursor = connections[self.using].cursor()
+        cursor.executemany(sql, [(article.pk, record['content'])
+                                 for article, record in pending])
+
+    def attach_tags(self, pending):
+        names = set()
+        for article, record in pending:
+            names.update(split(record.get('tags')))
+        if not names:
+            return
+
+        tags = dict((tag.name, tag) for tag in
+                    Tag.objects.using(self.using).filter(name__in=names))
+        for name in names - set(tags):
+            # new tags only, known ones are reused
+            tags[name], created = Tag.objects.using(
+                self.using).get_or_create(name=name)
+
+        # same content type as tags added to a Post in the admin
+        content_type = ContentType.objects.get_for_model(Post)
+        TaggedItem.objects.using(self.using).bulk_create([
+            TaggedItem(tag=tags[name], object_id=article.pk,
+                       content_type=content_type)
+            for article, record in pending
+            for name in set(split(record.get('tags')))])
+
+    def attach_sources(self, pending):
+        slugs = set()
+        for article, record in pending:
+            slugs.update(split(record.get('sources')))
+        if not slugs:
+            return
+
+        sources = dict(Source.objects.using(self.using).filter(
+            site=self.site, slug__in=slugs).values_list('slug', 'pk'))
+        ArticleSource.objects.using(self.using).bulk_create([
+            ArticleSource(article_id=article.pk, source_id=sources[slug],
+                          order=order)
+            for article, record in pending
+            for order, slug in enumerate(split(record.get('sources')))
+            if slug in sources])
+
+    def attach_images(self, pending):
+        ArticleImage.objects.using(self.using).bulk_create([
+            ArticleImage(article_id=article.pk, image_id=image, order=order)
+            for article, record in pending
+            for order, image in enumerate(split(record.get('images')))])
+
+    def finish(self):
+        """
+        Work deferred until the whole input is in: caches and counts
+        updated once per channel, short URLs queued. Cleared for the next
+        run.
+        """
+        long_slugs = set()
+        for channel in self.channels_touched:
+            long_slugs.update(channel.get_ancestors(
+                include_self=True).values_list('long_slug', flat=True))
+        invalidate_channels(self.site, long_slugs)
+
+        for long_slug, count in self.counts.items():
+            for model in (Post, Article):
+                update_count(model, self.site, long_slug, count)
+
+        for pk, url in self.short_urls:
+            enqueue(shorturl_task, Post, pk, url)
+
+        self.channels_touched = set()
+        self.counts = defaultdict(int)
+        self.short_urls = []
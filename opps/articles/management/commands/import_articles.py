@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+from optparse import make_option
+
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import Site
+from django.core.management.base import BaseCommand, CommandError
+
+from opps.articles.importer import BulkImporter, FORMATS, read_records
+from opps.core import tasks
+
+
+class Command(BaseCommand):
+    args = u'<file file ...> (- for stdin)'
+    help = (u"Imports posts from JSON (one object per line), CSV or XML "
+            u"files, see opps.articles.importer")
+    option_list = BaseCommand.option_list + (
+        make_option('--format', dest='format', choices=FORMATS,
+                    help=u"json, csv or xml, by default the file "
+                         u"extension"),
+        make_option('--site', type='int', dest='site', default=None,
+                    help=u"Site id, SITE_ID by default"),
+        make_option('--user', dest='user', default=None,
+                    help=u"Username of the author, the first superuser "
+                         u"by default"),
+        make_option('--batch-size', type='int', dest='batch_size',
+                    default=500),
+    )
+
+    def handle(self, *paths, **options):
+        if not paths:
+            raise CommandError(u"Give at least one file, - for stdin")
+
+        User = get_user_model()
+        try:
+            if options['user']:
+                user = User.objects.get(
+                    **{User.USERNAME_FIELD: options['user']})
+            else:
+                user = User.objects.filter(
+                    is_superuser=True).order_by('pk')[0]
+        except (User.DoesNotExist, IndexError):
+            raise CommandError(u"User not found")
+
+        site = None
+        if options['site']:
+            site = Site.objects.get(pk=options['site'])
+
+        importer = BulkImporter(site=site, user=user,
+                                batch_size=options['batch_size'])
+        start = time.time()
+        for path in paths:
+            format = options['format'] or \
+                os.path.splitext(path)[1].lstrip('.').lower() or 'json'
+            if format not in FORMATS:
+                raise CommandError(u"Unknown format: {}".format(format))
+            if path == '-':
+                importer.run(read_records(sys.stdin, format))
+            else:
+                with open(path, 'rb') as stream:
+                    importer.run(read_records(stream, format))
+        elapsed = time.time() - start
+
+        # short URLs are queued on this process
+        tasks.join()
+
+        if int(options['verbosity']) > 0:
+            self.stdout.write(
+                u"{} post(s) imported, {} skipped in {:.1f}s ({:.0f}/s)"
+                u"".format(importer.created, importer.skipped, elapsed,
+                           importer.created / elapsed if elapsed else 0))
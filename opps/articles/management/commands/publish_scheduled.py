@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import time
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_connection
+
+from opps.articles.scheduler import publish_scheduled
+
+
+class Command(BaseCommand):
+    help = (u"Publishes the articles whose date available has passed. "
+            u"Run it from cron or as a worker with --loop.")
+    option_list = BaseCommand.option_list + (
+        make_option('--loop', action='store_true', dest='loop',
+                    default=False,
+                    help=u"Keep running, once every --interval seconds"),
+        make_option('--interval', type='int', dest='interval',
+                    default=settings.OPPS_PUBLISH_SCHEDULER_INTERVAL,
+                    help=u"Seconds between runs with --loop"),
+    )
+
+    def handle(self, *args, **options):
+        while True:
+            count = publish_scheduled()
+            if count and int(options['verbosity']) > 0:
+                self.stdout.write(u"{} article(s) published".format(count))
+            if not options['loop']:
+                break
+            # don't keep a connection open while sleeping
+            close_connection()
+            time.sleep(options['interval'])
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from django.db import models
+from django.conf import settings
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django.core.exceptions import ValidationError
@@ -7,8 +8,14 @@ from django.core.exceptions import ValidationError
 from taggit.managers import TaggableManager
 
 from .signals import redirect_generate, shorturl_generate, delete_article
+from .signals import invalidate_article_cache, invalidate_channel_cache
+from .signals import invalidate_articlebox_cache, update_article_count
+from .signals import invalidate_articleboxarticles_cache
+from .signals import invalidate_article_boxes, invalidate_published_articles
 from opps.core.models import Publishable, BaseBox, BaseConfig
 from opps.core.models import Slugged
+from opps.core.signals import bulk_published, for_each_published
+from opps.channels.models import Channel
 
 
 class Article(Publishable, Slugged):
@@ -74,6 +81,12 @@ class Article(Publishable, Slugged):
         through='articles.ArticleSource',
     )
     tags = TaggableManager(blank=True, verbose_name=u'Tags')
+    # published and available, kept by save() and flipped by the
+    # publish_scheduled command once date_available passes
+    live = models.BooleanField(_(u"Live"), default=False, db_index=True,
+                               editable=False)
+
+    url_fields = ('slug', 'channel_long_slug', 'child_class')
 
     def __unicode__(self):
         return u"{}".format(self.get_absolute_url())
@@ -83,15 +96,29 @@ class Article(Publishable, Slugged):
         verbose_name = _('Article')
         verbose_name_plural = _('Articles')
         unique_together = ["site", "child_class", "channel_long_slug", "slug"]
+        index_together = [
+            ['site', 'channel_long_slug', 'published', 'date_available'],
+            ['site', 'child_class', 'published', 'date_available'],
+            ['site', 'channel_long_slug', 'live', 'date_available'],
+        ]
+
+    @staticmethod
+    def visible_lookups():
+        """
+        Filter of the articles visible now: the ``live`` flag when the
+        publication scheduler runs (``OPPS_PUBLISH_SCHEDULER``), otherwise
+        the publication date compared to the current time
+        """
+        if settings.OPPS_PUBLISH_SCHEDULER:
+            return {'live': True}
+        return {'published': True, 'date_available__lte': timezone.now()}
 
     def save(self, *args, **kwargs):
         self.channel_name = self.channel.name
         self.channel_long_slug = self.channel.long_slug
         self.child_class = self.__class__.__name__
         self.child_app_label = self._meta.app_label
-
-        models.signals.post_save.connect(shorturl_generate,
-                                         sender=self.__class__)
+        self.live = bool(self.is_published())
         super(Article, self).save(*args, **kwargs)
 
     def get_absolute_url(self):
@@ -117,15 +144,14 @@ class Article(Publishable, Slugged):
     get_http_absolute_url.short_description = 'URL'
 
     def recommendation(self):
-        tag_list = [t for t in self.tags.select_related('publisher')[:3]]
+        tag_list = [t for t in self.tags.all()[:3]]
         return [a for a in Article.objects.filter(
             child_class=self.child_class,
             channel_long_slug=self.channel_long_slug,
-            date_available__lte=timezone.now(),
-            published=True,
-            tags__in=tag_list).exclude(
+            tags__in=tag_list,
+            **Article.visible_lookups()).exclude(
                 pk=self.pk).distinct().select_related(
-                    'publisher').order_by('pk')[:10]]
+                    'channel', 'main_image', 'site').order_by('pk')[:10]]
 
     def all_images(self):
         imgs = [self.main_image]
@@ -162,8 +188,7 @@ class Post(Article):
         imgs = super(Post, self).all_images()
         imgs += [
             i for a in self.albums.filter(
-                published=True,
-                date_available__lte=timezone.now()
+                **Article.visible_lookups()
             ).distinct()
             for i in a.images.filter(
                 published=True,
@@ -177,8 +202,7 @@ class Post(Article):
         used in template
         """
         return self.related_posts.filter(
-            published=True,
-            date_available__lte=timezone.now()
+            **Article.visible_lookups()
         ).order_by(
             'postrelated_related__order'
         ).distinct()
@@ -323,6 +347,10 @@ class ArticleBox(BaseBox):
         verbose_name_plural = _('Articles boxes')
 
     def ordered_articles(self, field='order'):
+        if hasattr(self, '_ordered_articles'):
+            # attached by prefetch_ordered_articles
+            return self._ordered_articles
+
         now = timezone.now()
         qs = self.articles.filter(
             published=True,
@@ -334,6 +362,39 @@ class ArticleBox(BaseBox):
         )
         return qs.order_by('articleboxarticles_articles__order').distinct()
 
+    @classmethod
+    def prefetch_ordered_articles(cls, boxes):
+        """
+        Resolves the currently visible ordered articles of all ``boxes`` in
+        a single query and attaches them, so ``ordered_articles`` of each
+        box doesn't query again. Returns ``boxes`` as a list.
+        """
+        boxes = list(boxes)
+        if not boxes:
+            return boxes
+
+        now = timezone.now()
+        entries = ArticleBoxArticles.objects.filter(
+            articlebox__in=[box.pk for box in boxes],
+            article__published=True,
+            article__date_available__lte=now,
+            date_available__lte=now
+        ).filter(
+            models.Q(date_end__gte=now) | models.Q(date_end__isnull=True)
+        ).select_related(
+            'article', 'article__main_image', 'article__channel'
+        ).order_by('articlebox', 'order')
+
+        articles = dict((box.pk, []) for box in boxes)
+        for entry in entries:
+            box_articles = articles[entry.articlebox_id]
+            if entry.article not in box_articles:
+                box_articles.append(entry.article)
+
+        for box in boxes:
+            box._ordered_articles = articles[box.pk]
+        return boxes
+
     def get_queryset(self):
         """
         for backwards compatibility
@@ -363,6 +424,7 @@ class ArticleBoxArticles(models.Model):
 
     class Meta:
         ordering = ('order',)
+        index_together = [['articlebox', 'order', 'date_available']]
         verbose_name = _('Article box articles')
         verbose_name_plural = _('Article boxes articles')
 
@@ -391,3 +453,30 @@ class ArticleConfig(BaseConfig):
 
 models.signals.post_save.connect(redirect_generate, sender=Link)
 models.signals.post_delete.connect(delete_article, sender=Article)
+
+for sender in (Article, Post, Album, Link):
+    models.signals.post_save.connect(shorturl_generate, sender=sender)
+    models.signals.post_save.connect(invalidate_article_cache, sender=sender)
+    models.signals.post_delete.connect(invalidate_article_cache,
+                                       sender=sender)
+    models.signals.post_save.connect(update_article_count, sender=sender)
+    models.signals.post_save.connect(invalidate_article_boxes,
+                                     sender=sender)
+    models.signals.pre_delete.connect(invalidate_article_boxes,
+                                      sender=sender)
+    models.signals.post_delete.connect(update_article_count, sender=sender)
+    bulk_published.connect(invalidate_published_articles, sender=sender)
+models.signals.post_save.connect(invalidate_channel_cache, sender=Channel)
+models.signals.post_delete.connect(invalidate_channel_cache, sender=Channel)
+models.signals.post_save.connect(invalidate_articlebox_cache,
+                                 sender=ArticleBox)
+models.signals.post_delete.connect(invalidate_articlebox_cache,
+                                   sender=ArticleBox)
+models.signals.post_save.connect(invalidate_articleboxarticles_cache,
+                                 sender=ArticleBoxArticles)
+models.signals.post_delete.connect(invalidate_articleboxarticles_cache,
+                                   sender=ArticleBoxArticles)
+bulk_published.connect(for_each_published(invalidate_channel_cache),
+                       sender=Channel, weak=False)
+bulk_published.connect(for_each_published(invalidate_articlebox_cache),
+                       sender=ArticleBox, weak=False)
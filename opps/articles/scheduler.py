@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+from django.db import models
+from django.utils import timezone
+
+from opps.articles.models import Article
+
+
+def claim(pk):
+    """
+    Turns ``live`` on for the article ``pk`` if it is still off, True when
+    this call did it: of concurrent runs only one claims each row
+    """
+    return Article.objects.filter(pk=pk, live=False).update(live=True) == 1
+
+
+def publish_scheduled(now=None):
+    """
+    Turns ``live`` on for the published articles whose date_available has
+    passed, one UPDATE per article, then sends post_save for each of them
+    (as their concrete class) just like publishing them in the admin.
+    Returns the number of articles published by this run.
+    """
+    now = now or timezone.now()
+    rows = list(Article.objects.filter(
+        published=True, live=False, date_available__lte=now
+    ).values_list('pk', 'child_app_label', 'child_class'))
+    if not rows:
+        return 0
+
+    # rows flipped meanwhile by another run are left to that run
+    rows = [row for row in rows if claim(row[0])]
+
+    pks = defaultdict(list)
+    for pk, app_label, child_class in rows:
+        model = models.get_model(app_label or 'articles',
+                                 child_class or 'Article') or Article
+        pks[model].append(pk)
+
+    for model, model_pks in pks.items():
+        for instance in model.objects.filter(
+                pk__in=model_pks).select_related('site', 'channel'):
+            # was not visible before this run, see update_article_count
+            instance._was_published = False
+            models.signals.post_save.send(
+                sender=model, instance=instance, created=False, raw=False,
+                using=instance._state.db, update_fields=frozenset(['live']))
+
+    return len(rows)
@@ -1,7 +1,26 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import logging
+from collections import defaultdict
+
+from django.db import models
+from django.utils import timezone
+from django.core.exceptions import ObjectDoesNotExist
 from django.contrib.redirects.models import Redirect
-from googl.short import GooglUrlShort
+
+from opps.core.cache import _cache_key, invalidate, bump_generation
+from opps.core.cache import invalidate_box, FEED_NAMESPACE
+from opps.core.paginator import update_count
+from opps.core.shortener import get_shortener
+from opps.core.tasks import enqueue_on_commit
+
+
+logger = logging.getLogger(__name__)
+
+
+# models served by the generic views, their list and detail caches are
+# dropped whenever an article, channel or box they depend on changes
+CACHED_MODELS = ('Article', 'Post', 'Album', 'Link')
 
 
 def redirect_generate(sender, instance, created, **kwargs):
@@ -13,11 +32,34 @@ def redirect_generate(sender, instance, created, **kwargs):
 
 
 def shorturl_generate(sender, instance, created, **kwargs):
-    if not instance.short_url:
-        instance.short_url = GooglUrlShort(
-            instance.get_http_absolute_url()
-        ).short()
-        instance.save()
+    """
+    Stores the short URL with an UPDATE, no second save(). Remote
+    shorteners run on the background queue once the article is
+    committed, saving never waits on the network.
+    """
+    if instance.short_url or kwargs.get('raw'):
+        return
+    shortener = get_shortener()
+    url = instance.get_http_absolute_url()
+    if shortener.remote:
+        enqueue_on_commit(shorturl_task, sender, instance.pk, url)
+        return
+    instance.short_url = shortener.short(url, instance.pk)
+    sender.objects.filter(pk=instance.pk).update(
+        short_url=instance.short_url)
+
+
+def shorturl_task(model, pk, url):
+    short_url = get_shortener().short(url, pk)
+    if not model.objects.filter(pk=pk).update(short_url=short_url):
+        # deleted or rolled back, the next save generates it again
+        logger.warning(u"Short URL %s of %s %s not stored, no such row",
+                       short_url, model.__name__, pk)
+        return None
+    # rows cached before the short URL was known
+    invalidate_article_cache(model, model.objects.select_related(
+        'site', 'channel').get(pk=pk))
+    return short_url
 
 
 def delete_article(sender, instance, using, **kwargs):
@@ -35,3 +77,168 @@ def delete_article(sender, instance, using, **kwargs):
     except instance.__class__.DoesNotExist:
         # object not exists
         pass
+
+
+def _channel_long_slugs(channel):
+    """
+    long_slug of the channel and all its ancestors, every list page that
+    can show content of this channel
+    """
+    return channel.get_ancestors(include_self=True).values_list(
+        'long_slug', flat=True)
+
+
+def _long_slug_path(long_slug):
+    """
+    ``long_slug`` and those of its ancestors, from the slug path alone:
+    the channel may have been moved or deleted since
+    """
+    parts = long_slug.split('/')
+    return [u'/'.join(parts[:i + 1]) for i in range(len(parts))]
+
+
+def article_cache_keys(article):
+    """
+    detail keys of ``article`` for all models cached by the generic views
+    """
+    return [_cache_key('detail', models.get_model('articles', name),
+                       article.site, article.channel_long_slug, article.slug)
+            for name in CACHED_MODELS]
+
+
+def invalidate_channels(site, long_slugs):
+    """
+    list pages are cached with paging and model dimensions, so instead of
+    deleting exact keys the channel generations are bumped, the main feed
+    with them
+    """
+    for long_slug in set(long_slugs):
+        bump_generation(site, long_slug)
+    bump_generation(site, FEED_NAMESPACE)
+
+
+def invalidate_article_cache(sender, instance, **kwargs):
+    try:
+        long_slugs = list(_channel_long_slugs(instance.channel))
+    except ObjectDoesNotExist:
+        # channel deleted in cascade
+        long_slugs = []
+    long_slugs.append(instance.channel_long_slug)
+    # moved to another channel: the lists of the one it was loaded from
+    loaded = getattr(instance, '_loaded_url_fields', {}).get(
+        'channel_long_slug')
+    if loaded and loaded != instance.channel_long_slug:
+        long_slugs.extend(_long_slug_path(loaded))
+
+    # the exact keys are built under the current generations, so they
+    # are deleted before the bump
+    invalidate(article_cache_keys(instance))
+    invalidate_channels(instance.site, long_slugs)
+
+
+def invalidate_channel_cache(sender, instance, **kwargs):
+    long_slugs = list(_channel_long_slugs(instance))
+    long_slugs.append(instance.long_slug)
+
+    invalidate_channels(instance.site, long_slugs)
+
+
+def invalidate_articlebox_cache(sender, instance, **kwargs):
+    # rendered fragments are dropped by opps.core.signals
+    try:
+        article = instance.article
+    except ObjectDoesNotExist:
+        article = None
+    if article:
+        # before the channel generations move, see invalidate_article_cache
+        invalidate(article_cache_keys(article))
+    if instance.channel_long_slug:
+        try:
+            long_slugs = list(_channel_long_slugs(instance.channel))
+        except (ObjectDoesNotExist, AttributeError):
+            long_slugs = [instance.channel_long_slug]
+        invalidate_channels(instance.site, long_slugs)
+
+
+def invalidate_articleboxarticles_cache(sender, instance, **kwargs):
+    """
+    an entry added, reordered or removed changes the rendered box
+    """
+    try:
+        box = instance.articlebox
+    except ObjectDoesNotExist:
+        box = None
+    if box:
+        invalidate_box(box.site, box.slug, box.channel_long_slug)
+
+
+def invalidate_article_boxes(sender, instance, **kwargs):
+    """
+    Fragments of the boxes listing ``instance``, connected to pre_delete
+    too: once deleted its box entries no longer point to it
+    """
+    ArticleBox = models.get_model('articles', 'ArticleBox')
+    boxes = ArticleBox.objects.filter(
+        models.Q(articles=instance.pk) | models.Q(article=instance.pk)
+    ).select_related('site').distinct()
+    for box in boxes:
+        invalidate_box(box.site, box.slug, box.channel_long_slug)
+
+
+def update_article_count(sender, instance, **kwargs):
+    """
+    Keeps the approximate channel counts used by paginate_mode
+    'approximate' in sync with publish/unpublish/delete
+    """
+    was_published = instance._was_published
+    # post_delete sends no ``created``
+    is_published = 'created' in kwargs and bool(instance.is_published())
+    if was_published == is_published:
+        return
+
+    instance._was_published = is_published
+    delta = 1 if is_published else -1
+    for model in [sender] + list(sender._meta.get_parent_list()):
+        update_count(model, instance.site, instance.channel_long_slug, delta)
+
+
+def invalidate_published_articles(sender, pks, published, **kwargs):
+    """
+    bulk_published (see opps.core.models.bulk_publish): caches of the
+    articles, their channels and boxes dropped once per channel or box,
+    approximate counts moved by the rows that became visible/invisible
+    """
+    ArticleBox = models.get_model('articles', 'ArticleBox')
+    now = timezone.now()
+    channels = {}
+    boxes = {}
+    counts = defaultdict(int)
+    keys = []
+    for i in range(0, len(pks), 500):
+        chunk = pks[i:i + 500]
+        for article in sender.objects.filter(pk__in=chunk).select_related(
+                'site', 'channel'):
+            keys.extend(article_cache_keys(article))
+            channels[article.channel_id] = article
+            if article.date_available and article.date_available <= now:
+                counts[(article.site, article.channel_long_slug)] += 1
+        for box in ArticleBox.objects.filter(
+                models.Q(articles__in=chunk) | models.Q(article__in=chunk)
+        ).select_related('site').distinct():
+            boxes[box.pk] = box
+
+    invalidate(keys)
+    for article in channels.values():
+        long_slugs = [article.channel_long_slug]
+        try:
+            long_slugs.extend(_channel_long_slugs(article.channel))
+        except (ObjectDoesNotExist, AttributeError):
+            pass
+        invalidate_channels(article.site, long_slugs)
+    for box in boxes.values():
+        invalidate_box(box.site, box.slug, box.channel_long_slug)
+
+    delta = 1 if published else -1
+    for (site, long_slug), count in counts.items():
+        for model in [sender] + list(sender._meta.get_parent_list()):
+            update_count(model, site, long_slug, delta * count)
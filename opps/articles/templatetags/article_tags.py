@@ -4,42 +4,84 @@ from django.conf import settings
 from django.utils import timezone
 from django.utils.safestring import mark_safe
 
-from opps.articles.models import ArticleBox
+from opps.articles.models import ArticleBox, ArticleBoxArticles
+from opps.core.cache import _cache_key, box_namespace, cache_fetch
+from opps.core.cache import next_transition, transition_timeout
+from opps.core.sites import get_request_site
+from opps.core.utils import is_mobile
 
 
 register = template.Library()
 
 
-@register.simple_tag
-def get_articlebox(slug, template_name=None):
+@register.simple_tag(takes_context=True)
+def get_articlebox(context, slug, template_name=None):
+    site = get_request_site(context.get('request'))
 
-    try:
-        box = ArticleBox.objects.get(site=settings.SITE_ID, slug=slug,
-                                     date_available__lte=timezone.now(),
-                                     published=True)
-    except ArticleBox.DoesNotExist:
-        box = None
+    def render():
+        try:
+            box = ArticleBox.objects.get(site=site, slug=slug,
+                                         date_available__lte=timezone.now(),
+                                         published=True)
+            ArticleBox.prefetch_ordered_articles([box])
+        except ArticleBox.DoesNotExist:
+            box = None
 
-    t = template.loader.get_template('articles/articlebox_detail.html')
-    if template_name:
-        t = template.loader.get_template(template_name)
+        t = template.loader.get_template('articles/articlebox_detail.html')
+        if template_name:
+            t = template.loader.get_template(template_name)
 
-    return t.render(template.Context({'articlebox': box, 'slug': slug}))
+        return t.render(template.Context({'articlebox': box, 'slug': slug}))
 
+    def timeout():
+        return boxes_timeout(ArticleBox.objects.filter(
+            site=site, slug=slug, published=True))
 
-@register.simple_tag
-def get_all_articlebox(channel_long_slug, template_name=None):
-    boxes = ArticleBox.objects.filter(
-        site=settings.SITE_ID,
-        date_available__lte=timezone.now(),
-        published=True,
-        channel_long_slug=channel_long_slug).select_related('publisher')
-
-    t = template.loader.get_template('articles/articlebox_list.html')
-    if template_name:
-        t = template.loader.get_template(template_name)
-
-    return t.render(template.Context({'articleboxes': boxes}))
+    cachekey = _cache_key('fragment', ArticleBox, site,
+                          box_namespace(slug), template_name or '',
+                          mobile=is_mobile(context.get('request')))
+    return cache_fetch(cachekey, render, timeout)
+
+
+@register.simple_tag(takes_context=True)
+def get_all_articlebox(context, channel_long_slug, template_name=None):
+    site = get_request_site(context.get('request'))
+
+    def render():
+        boxes = ArticleBox.prefetch_ordered_articles(
+            ArticleBox.objects.filter(site=site,
+                                      date_available__lte=timezone.now(),
+                                      published=True,
+                                      channel_long_slug=channel_long_slug))
+
+        t = template.loader.get_template('articles/articlebox_list.html')
+        if template_name:
+            t = template.loader.get_template(template_name)
+
+        return t.render(template.Context({'articleboxes': boxes}))
+
+    def timeout():
+        return boxes_timeout(ArticleBox.objects.filter(
+            site=site, published=True,
+            channel_long_slug=channel_long_slug))
+
+    cachekey = _cache_key('fragments', ArticleBox, site,
+                          channel_long_slug, template_name or '',
+                          mobile=is_mobile(context.get('request')))
+    return cache_fetch(cachekey, render, timeout)
+
+
+def boxes_timeout(boxes):
+    """
+    expiry of a fragment rendering ``boxes``: capped to the next time a box
+    becomes available, an entry starts or ends or a member article is
+    published
+    """
+    return transition_timeout([
+        next_transition(boxes, 'date_available'),
+        next_transition(
+            ArticleBoxArticles.objects.filter(articlebox__in=boxes),
+            'date_available', 'date_end', 'article__date_available')])
 
 
 @register.simple_tag
@@ -1,2 +1,6 @@
 # -*- coding: utf-8 -*-
+from opps.articles.tests.importer import *
 from opps.articles.tests.models import *
+from opps.articles.tests.scheduler import *
+from opps.articles.tests.signals import *
+from opps.articles.tests.views import *
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from StringIO import StringIO
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from mock import call, patch
+
+from opps.articles.importer import BulkImporter, read_records
+from opps.articles.models import Article, Post
+
+
+class ReadRecordsTest(TestCase):
+
+    def test_json_lines(self):
+        stream = StringIO('{"title": "a"}\n\n{"title": "b"}\n')
+        self.assertEqual([r['title'] for r in read_records(stream)],
+                         [u'a', u'b'])
+
+    def test_csv(self):
+        stream = StringIO('title,channel,tags\na,channel-01,"x,y"\n')
+        self.assertEqual(list(read_records(stream, 'csv')),
+                         [{'title': u'a', 'channel': u'channel-01',
+                           'tags': u'x,y'}])
+
+    def test_xml(self):
+        stream = StringIO('<articles><article><title>a</title>'
+                          '<content>c</content></article></articles>')
+        self.assertEqual(list(read_records(stream, 'xml')),
+                         [{'title': u'a', 'content': u'c'}])
+
+
+class BulkImporterTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def setUp(self):
+        self.importer = BulkImporter(
+            user=get_user_model().objects.get(pk=1), batch_size=2)
+
+    def record(self, i, **kwargs):
+        record = {'channel': u'channel-01', 'title': u'Wire {}'.format(i),
+                  'content': u'content {}'.format(i), 'tags': u'wire,news',
+                  'short_url': u'http://example.com/wire-{}'.format(i)}
+        record.update(kwargs)
+        return record
+
+    def test_creates_posts(self):
+        self.assertEqual(self.importer.run(
+            [self.record(i) for i in range(5)]), 5)
+
+        post = Post.objects.get(slug=u'wire-3')
+        self.assertEqual(post.content, u'content 3')
+        self.assertEqual(post.channel_long_slug, u'channel-01')
+        self.assertTrue(post.live)
+        self.assertEqual(sorted(post.tags.names()), [u'news', u'wire'])
+
+    def test_skips_invalid_and_taken(self):
+        self.importer.run([self.record(1)])
+        self.assertEqual(self.importer.run([
+            self.record(1),
+            self.record(2, channel=u'unknown'),
+            self.record(3, title=u''),
+            self.record(4),
+            self.record(4),
+        ]), 1)
+        self.assertEqual(self.importer.created, 2)
+        self.assertEqual(self.importer.skipped, 4)
+
+    def test_skips_missing_images(self):
+        self.assertEqual(self.importer.run([
+            self.record(1, main_image=1, images=u'1'),
+            self.record(2, main_image=99),
+            self.record(3, images=u'1,99'),
+            self.record(4, images=u'x'),
+        ]), 1)
+        self.assertEqual(self.importer.skipped, 3)
+        self.assertEqual(
+            list(Post.objects.get(slug=u'wire-1').images.values_list(
+                'pk', flat=True)), [1])
+
+    @patch('opps.articles.importer.enqueue')
+    @patch('opps.articles.importer.update_count')
+    def test_run_twice(self, update_count, enqueue):
+        self.assertEqual(self.importer.run(
+            [self.record(1, short_url=None), self.record(2)]), 2)
+        self.assertEqual(self.importer.run([self.record(3)]), 1)
+
+        self.assertEqual(self.importer.created, 3)
+        site = self.importer.site
+        self.assertEqual(update_count.call_args_list, [
+            call(Post, site, u'channel-01', 2),
+            call(Article, site, u'channel-01', 2),
+            call(Post, site, u'channel-01', 1),
+            call(Article, site, u'channel-01', 1)])
+        # the short URL of the first run is queued once
+        self.assertEqual(enqueue.call_count, 1)
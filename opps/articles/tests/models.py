@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+from django.contrib.redirects.models import Redirect
 from django.test import TestCase
 
 from opps.articles.models import Article, Post
@@ -73,3 +74,29 @@ class PostModelTest(TestCase):
         all_images = set(self.post.all_images())
         self.assertEqual(list(all_images),
                          [i for i in Image.objects.all()])
+
+    def test_slug_change_creates_redirect(self):
+        self.post.slug = u'new-slug'
+        self.post.save()
+
+        redirect = Redirect.objects.get(old_path=u'/channel-01/'
+                                                 u'test-post-application')
+        self.assertEqual(redirect.new_path, u'/channel-01/new-slug')
+
+    def test_save_without_url_change(self):
+        self.post.title = u'new title'
+        self.post.save()
+        self.post.save()
+
+        self.assertFalse(Redirect.objects.exists())
+
+    def test_no_chain_of_redirects(self):
+        self.post.slug = u'second'
+        self.post.save()
+        self.post.slug = u'third'
+        self.post.save()
+
+        self.assertEqual(
+            sorted(Redirect.objects.values_list('old_path', 'new_path')),
+            [(u'/channel-01/second', u'/channel-01/third'),
+             (u'/channel-01/test-post-application', u'/channel-01/third')])
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from django.db import models
+from django.test import TestCase
+from django.utils import timezone
+from mock import patch
+
+from opps.articles.models import Article, Post
+from opps.articles.scheduler import claim, publish_scheduled
+from opps.core.models import bulk_publish
+from opps.core.signals import bulk_published
+
+
+def mark_fixtures_live():
+    # the published articles of initial_data.json load with live=False
+    Article.objects.filter(published=True,
+                           date_available__lte=timezone.now()).update(
+        live=True)
+
+
+class PublishScheduledTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def setUp(self):
+        mark_fixtures_live()
+        self.post = Post.objects.create(
+            title=u'scheduled', slug=u'scheduled', content=u'content',
+            channel_id=2, site_id=1, user_id=1, main_image_id=1,
+            published=True, short_url=u'http://example.com/scheduled',
+            date_available=timezone.now() + timedelta(hours=1))
+
+        self.saved = []
+
+        def receiver(sender, instance, **kwargs):
+            self.saved.append((sender, instance.pk))
+        models.signals.post_save.connect(receiver, sender=Post, weak=False,
+                                         dispatch_uid='scheduler-test')
+        self.addCleanup(models.signals.post_save.disconnect, sender=Post,
+                        dispatch_uid='scheduler-test')
+
+    def test_not_live_before_date_available(self):
+        self.assertFalse(Article.objects.get(pk=self.post.pk).live)
+        self.assertEqual(publish_scheduled(), 0)
+        self.assertEqual(self.saved, [])
+
+    def test_live_once_date_available_passes(self):
+        later = timezone.now() + timedelta(hours=2)
+        self.assertEqual(publish_scheduled(now=later), 1)
+
+        self.assertTrue(Article.objects.get(pk=self.post.pk).live)
+        self.assertEqual(self.saved, [(Post, self.post.pk)])
+        self.assertEqual(publish_scheduled(now=later), 0)
+
+    def test_rows_claimed_by_another_run(self):
+        def concurrent(pk):
+            # another run flips the row between the SELECT and the UPDATE
+            Article.objects.filter(pk=pk).update(live=True)
+            return claim(pk)
+
+        later = timezone.now() + timedelta(hours=2)
+        with patch('opps.articles.scheduler.claim', side_effect=concurrent):
+            self.assertEqual(publish_scheduled(now=later), 0)
+        self.assertEqual(self.saved, [])
+
+    def test_unpublished_never_live(self):
+        Post.objects.filter(pk=self.post.pk).update(published=False)
+        later = timezone.now() + timedelta(hours=2)
+        self.assertEqual(publish_scheduled(now=later), 0)
+
+
+class BulkPublishTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def setUp(self):
+        mark_fixtures_live()
+        self.future = timezone.now() + timedelta(hours=1)
+        self.posts = [Post.objects.create(
+            title=u'bulk {}'.format(i), slug=u'bulk-{}'.format(i),
+            content=u'content', channel_id=2, site_id=1, user_id=1,
+            main_image_id=1, short_url=u'http://example.com/{}'.format(i),
+            date_available=self.future) for i in range(3)]
+        self.pks = sorted(post.pk for post in self.posts)
+
+        self.sent = []
+        self.saved = []
+
+        def receiver(sender, pks, published, **kwargs):
+            self.sent.append((sender, sorted(pks), published))
+
+        def saved(sender, **kwargs):
+            self.saved.append(sender)
+        bulk_published.connect(receiver, weak=False,
+                               dispatch_uid='bulk-publish-test')
+        models.signals.post_save.connect(saved, weak=False,
+                                         dispatch_uid='bulk-publish-test')
+        self.addCleanup(bulk_published.disconnect,
+                        dispatch_uid='bulk-publish-test')
+        self.addCleanup(models.signals.post_save.disconnect,
+                        dispatch_uid='bulk-publish-test')
+
+    def test_publish_now(self):
+        queryset = Post.objects.filter(pk__in=self.pks)
+        self.assertEqual(bulk_publish(queryset), 3)
+
+        for post in queryset:
+            self.assertTrue(post.published)
+            self.assertTrue(post.live)
+            self.assertTrue(post.date_available <= timezone.now())
+        self.assertEqual(self.sent, [(Post, self.pks, True)])
+        self.assertEqual(self.saved, [])
+
+        # already published rows are not changed again
+        self.assertEqual(bulk_publish(queryset), 0)
+        self.assertEqual(len(self.sent), 1)
+
+    def test_schedule_keeps_date_available(self):
+        queryset = Post.objects.filter(pk__in=self.pks)
+        self.assertEqual(bulk_publish(queryset, schedule=True), 3)
+
+        for post in queryset:
+            self.assertTrue(post.published)
+            self.assertFalse(post.live)
+            self.assertEqual(post.date_available, self.future)
+        later = self.future + timedelta(hours=1)
+        self.assertEqual(publish_scheduled(now=later), 3)
+
+    def test_unpublish(self):
+        queryset = Post.objects.filter(pk__in=self.pks)
+        bulk_publish(queryset)
+        self.assertEqual(bulk_publish(queryset, publish=False), 3)
+
+        self.assertFalse(queryset.filter(published=True).exists())
+        self.assertFalse(queryset.filter(live=True).exists())
+        self.assertEqual(self.sent[-1], (Post, self.pks, False))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from django.contrib.sites.models import Site
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+from mock import patch
+
+from opps.articles.models import Article, Post
+from opps.channels.models import Channel
+from opps.core.cache import _cache_key, FEED_NAMESPACE
+
+
+class InvalidateArticleCacheTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def setUp(self):
+        self.cache = LocMemCache('opps-articles-tests', {})
+        self.cache.clear()
+        patcher = patch('opps.core.cache.cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.site = Site.objects.get(pk=1)
+        self.post = Post.objects.get(pk=1)
+
+    def keys(self, long_slug=u'channel-01'):
+        # the keys OppsList, OppsDetail, ArticleFeed and ChannelFeed use
+        return {
+            'list': _cache_key('list', Post, self.site, long_slug,
+                               'offset', '', 10),
+            'detail': _cache_key('detail', Post, self.site, long_slug,
+                                 self.post.slug),
+            'feed': _cache_key('feed', Article, self.site, FEED_NAMESPACE),
+            'channel feed': _cache_key('feed', Post, self.site, long_slug),
+        }
+
+    def fill(self, keys):
+        for key in keys.values():
+            self.cache.set(key, 'cached')
+
+    def assertMissed(self, keys):
+        for name, key in keys.items():
+            self.assertEqual(self.cache.get(key), None, name)
+
+    def test_save(self):
+        keys = self.keys()
+        self.fill(keys)
+        self.post.title = u'changed'
+        self.post.save()
+
+        self.assertMissed(self.keys())
+        # deleted before the generation bump, not just left to expire
+        self.assertEqual(self.cache.get(keys['detail']), None)
+
+    def test_delete(self):
+        self.fill(self.keys())
+        self.post.delete()
+        self.assertMissed(self.keys())
+
+    def test_moved_channel(self):
+        self.fill(self.keys())
+        self.fill(self.keys(u'channel-02'))
+        self.post.channel = Channel.objects.get(long_slug=u'channel-02')
+        self.post.save()
+
+        self.assertMissed(self.keys())
+        self.assertMissed(self.keys(u'channel-02'))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+from datetime import timedelta
+
+from django.contrib.sites.models import Site
+from django.db import connection
+from django.http import Http404
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from opps.articles.models import Post, ArticleBox, ArticleBoxArticles
+from opps.articles.views import PostList
+from opps.articles.views.feed import ArticleFeed
+
+
+TEMPLATE_DIRS = (os.path.join(os.path.dirname(__file__), 'templates'),)
+
+
+@override_settings(ROOT_URLCONF='opps.urls', TEMPLATE_DIRS=TEMPLATE_DIRS)
+class PostListQueriesTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def setUp(self):
+        self.box = ArticleBox.objects.create(
+            name=u'Box', slug=u'box-channel-01', site_id=1, user_id=1,
+            channel_id=2, published=True,
+            date_available=timezone.now() - timedelta(days=1))
+        self.total = 0
+
+    def add_posts(self, number):
+        yesterday = timezone.now() - timedelta(days=1)
+        for i in range(self.total, self.total + number):
+            post = Post.objects.create(
+                title=u'post {}'.format(i), slug=u'post-{}'.format(i),
+                content=u'content', channel_id=2, site_id=1, user_id=1,
+                main_image_id=1, published=True, date_available=yesterday,
+                short_url=u'http://example.com/{}'.format(i))
+            ArticleBoxArticles.objects.create(
+                articlebox=self.box, article=post, order=i,
+                date_available=yesterday)
+        self.total += number
+
+    def render(self):
+        request = RequestFactory().get('/channel-01/')
+        response = PostList.as_view()(request,
+                                      channel__long_slug=u'channel-01')
+        response.render()
+
+        context = response.context_data
+        for post in context['context']:
+            post.channel.long_slug, post.main_image, post.site.domain
+        for post in context['posts']:
+            post.channel.long_slug, post.main_image, post.site.domain
+        for box in context['articleboxes']:
+            for article in box.ordered_articles():
+                article.channel.long_slug, article.main_image
+        return response
+
+    def count_queries(self):
+        self.render()  # warm up site and template caches
+        connection.use_debug_cursor = True
+        start = len(connection.queries)
+        try:
+            self.render()
+            return len(connection.queries) - start
+        finally:
+            connection.use_debug_cursor = False
+
+    def test_queries_do_not_grow_with_articles(self):
+        self.add_posts(2)
+        few = self.count_queries()
+
+        self.add_posts(8)
+        many = self.count_queries()
+
+        self.assertEqual(few, many)
+
+    def test_box_articles_attached(self):
+        self.add_posts(3)
+        response = self.render()
+        box = response.context_data['articleboxes'][0]
+        with self.assertNumQueries(0):
+            articles = box.ordered_articles()
+        self.assertEqual([a.slug for a in articles],
+                         [u'post-0', u'post-1', u'post-2'])
+
+
+@override_settings(ROOT_URLCONF='opps.urls', TEMPLATE_DIRS=TEMPLATE_DIRS)
+class KeysetListTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def get(self, cursor):
+        request = RequestFactory().get('/channel-01/', {'cursor': cursor})
+        return PostList.as_view(paginate_mode='keyset')(
+            request, channel__long_slug=u'channel-01')
+
+    def test_tampered_cursor(self):
+        for cursor in ('not a cursor', 'bm90fGE='):
+            self.assertRaises(Http404, self.get, cursor)
+
+
+class FeedQueriesTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def test_related_loaded_with_items(self):
+        feed = ArticleFeed()
+        feed.site = Site.objects.get(pk=1)
+        items = feed.items()
+        self.assertTrue(items)
+        with self.assertNumQueries(0):
+            for item in items:
+                item.channel.long_slug, item.main_image, item.site.domain
@@ -1,14 +1,15 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 from django.core.paginator import Paginator, InvalidPage
-from django.contrib.sites.models import get_current_site
-from django.utils import timezone
-from django.http import Http404
+from django.http import Http404, HttpResponsePermanentRedirect
+from django.shortcuts import get_object_or_404
 
 from haystack.views import SearchView
 
 from opps.articles.models import Post, Album, Article
 from opps.articles.views.generic import OppsDetail, OppsList
+from opps.core.shortener import base62_decode
+from opps.core.sites import get_request_site
 
 
 class PostList(OppsList):
@@ -40,13 +41,13 @@ class TagList(OppsList):
 
     @property
     def queryset(self):
-        self.site = get_current_site(self.request)
+        self.site = get_request_site(self.request)
         self.long_slug = self.kwargs['tag']
         self.article = self.model.objects.filter(
             site=self.site,
             tags__slug=self.long_slug,
-            date_available__lte=timezone.now(),
-            published=True).all()
+            **self.model.visible_lookups()).select_related(
+            *self.related_fields)
         return self.article
 
 
@@ -62,3 +63,17 @@ class Search(SearchView):
             raise Http404("No such page!")
 
         return (None, self.results)
+
+
+def short_url_redirect(request, code):
+    """
+    short URLs of LocalShortener, base62 of the article id
+    """
+    try:
+        pk = base62_decode(code)
+    except ValueError:
+        raise Http404("No such short URL!")
+    article = get_object_or_404(Article, pk=pk,
+                                site=get_request_site(request),
+                                **Article.visible_lookups())
+    return HttpResponsePermanentRedirect(article.get_absolute_url())
@@ -1,12 +1,14 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 from django.contrib.syndication.views import Feed
-from django.contrib.sites.models import get_current_site
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
 
 from opps.articles.models import Article, Post, Album, Link
+from opps.articles.views.generic import OppsView
 from opps.channels.models import Channel
+from opps.core.cache import _cache_key, cache_objects, transition_expiry
+from opps.core.cache import FEED_NAMESPACE
+from opps.core.sites import get_request_site
 
 
 class ArticleFeed(Feed):
@@ -14,7 +16,7 @@ class ArticleFeed(Feed):
     link = "/rss"
 
     def __call__(self, request, *args, **kwargs):
-        self.site = get_current_site(request)
+        self.site = get_request_site(request)
         return super(ArticleFeed, self).__call__(request, *args, **kwargs)
 
     def title(self):
@@ -24,15 +26,20 @@ class ArticleFeed(Feed):
         return "Latest news on {0}'s".format(self.site.name)
 
     def items(self):
-        return Article.objects.filter(
+        scheduled = Article.objects.filter(
             site=self.site,
-            date_available__lte=timezone.now(),
             published=True,
             channel__include_in_main_rss=True,
             channel__published=True
+        )
+        cachekey = _cache_key('feed', Article, self.site, FEED_NAMESPACE)
+        return cache_objects(cachekey, scheduled.filter(
+            **Article.visible_lookups()
         ).order_by(
             '-date_available'
-        ).select_related('publisher')[:40]
+        )[:40],
+            timeout=transition_expiry(scheduled),
+            related=OppsView.related_fields)
 
 
 class ChannelFeed(Feed):
@@ -42,7 +49,7 @@ class ChannelFeed(Feed):
         self.model = _model[model]
 
     def get_object(self, request, long_slug):
-        self.site = get_current_site(request)
+        self.site = get_request_site(request)
         return get_object_or_404(Channel,
                                  site=self.site,
                                  long_slug=long_slug)
@@ -58,11 +65,16 @@ class ChannelFeed(Feed):
                                                           obj.name)
 
     def items(self, obj):
-        return self.model.objects.filter(
+        scheduled = self.model.objects.filter(
             site=self.site,
             channel_long_slug=obj.long_slug,
-            date_available__lte=timezone.now(),
             published=True,
+        )
+        cachekey = _cache_key('feed', self.model, self.site, obj.long_slug)
+        return cache_objects(cachekey, scheduled.filter(
+            **Article.visible_lookups()
         ).order_by(
             '-date_available'
-        ).select_related('publisher')[:40]
+        )[:40],
+            timeout=transition_expiry(scheduled),
+            related=OppsView.related_fields)
@@ -3,16 +3,18 @@
 from django.core.exceptions import ImproperlyConfigured
 from django.views.generic.detail import DetailView
 from django.views.generic.list import ListView
-from django.contrib.sites.models import get_current_site
-from django.core.cache import cache
-from django.shortcuts import get_object_or_404
-from django.utils import timezone
-from django import template
+from django.http import Http404
+from django.utils.translation import ugettext as _
 from django.conf import settings
 
 from opps.articles.models import ArticleBox, Article, Album
-from opps.channels.models import Channel
-from opps.core.cache import _cache_key
+from opps.channels.tree import get_channel_tree
+from opps.core.cache import _cache_key, cache_objects, transition_expiry
+from opps.core.loaders import resolve_template
+from opps.core.paginator import KeysetPaginator, NoCountPaginator
+from opps.core.paginator import LoaderPaginator
+from opps.core.paginator import ApproximateCountPaginator, approximate_count
+from opps.core.sites import get_request_site
 
 
 class OppsView(object):
@@ -20,6 +22,11 @@ class OppsView(object):
     context_object_name = "context"
     paginate_by = settings.OPPS_PAGINATE_BY
     limit = settings.OPPS_VIEWS_LIMIT
+    # fields stored in the result cache, None keeps every concrete field.
+    # anything else the templates touch is loaded on access (deferred)
+    cache_fields = None
+    # relations loaded for all listed objects at once, not one per object
+    related_fields = ('channel', 'main_image', 'site')
 
     def __init__(self):
         self.slug = None
@@ -27,6 +34,8 @@ class OppsView(object):
         self.long_slug = None
         self.channel_long_slug = []
         self.article = None
+        # published rows, available or not, see transition_expiry
+        self.scheduled = None
 
     def get_context_data(self, **kwargs):
         context = super(OppsView, self).get_context_data(**kwargs)
@@ -34,11 +43,12 @@ class OppsView(object):
         filters = {}
         filters['site'] = self.site
         filters['channel_long_slug__in'] = self.channel_long_slug
-        filters['date_available__lte'] = timezone.now()
-        filters['published'] = True
-        article = Article.objects.filter(**filters)
+        filters.update(Article.visible_lookups())
+        article = Article.objects.filter(**filters).select_related(
+            *self.related_fields)
         context['posts'] = article.filter(child_class='Post')[:self.limit]
-        context['albums'] = Album.objects.filter(**filters)[:self.limit]
+        context['albums'] = Album.objects.filter(**filters).select_related(
+            *self.related_fields)[:self.limit]
 
         context['channel'] = {}
         context['channel']['long_slug'] = self.long_slug
@@ -48,11 +58,14 @@ class OppsView(object):
             context['channel']['level'] = self.channel.get_level()
             context['channel']['root'] = self.channel.get_root()
 
-        context['articleboxes'] = ArticleBox.objects.filter(
-            channel__long_slug=self.long_slug)
+        articleboxes = ArticleBox.objects.filter(
+            channel__long_slug=self.long_slug).select_related(
+            'channel', 'article', 'site')
         if self.slug:
-            context['articleboxes'] = context['articleboxes'].filter(
-                article__slug=self.slug)
+            articleboxes = articleboxes.filter(article__slug=self.slug)
+        # ordered articles of every box in one query
+        context['articleboxes'] = ArticleBox.prefetch_ordered_articles(
+            articleboxes)
 
         return context
 
@@ -64,41 +77,60 @@ class OppsView(object):
 
     def get_long_slug(self):
         self.long_slug = self.kwargs.get('channel__long_slug', None)
-        try:
-            if not self.long_slug:
-                self.long_slug = Channel.objects.get_homepage(
-                    site=self.site).long_slug
-        except AttributeError:
-            pass
+        if not self.long_slug:
+            homepage = get_channel_tree(self.site).homepage
+            if homepage:
+                self.long_slug = homepage.long_slug
         return self.long_slug
 
     def set_channel_rules(self):
-        self.channel = get_object_or_404(Channel, site=self.site,
-                                         long_slug=self.long_slug,
-                                         date_available__lte=timezone.now(),
-                                         published=True)
+        # resolved from the in-process channel tree, no query
+        self.channel = get_channel_tree(self.site).get(self.long_slug)
+        if self.channel is None:
+            raise Http404(_(u"No %(verbose_name)s found matching the query")
+                          % {'verbose_name': _(u'Channel')})
 
-        self.channel_long_slug = [self.long_slug]
-        for children in self.channel.get_children():
-            self.channel_long_slug.append(children)
+        # whole subtree, precomputed from the MPTT lft/rght columns
+        self.channel_long_slug = list(self.channel.subtree_long_slugs)
 
     def check_template(self, _template):
-        try:
-            template.loader.get_template(_template)
-            return True
-        except template.TemplateDoesNotExist:
-            return False
+        return resolve_template([_template]) is not None
+
+    def render_to_response(self, context, **response_kwargs):
+        # the template resolve_template found, the response doesn't search
+        # the loaders for the names again
+        names = self.get_template_names()
+        response_kwargs.setdefault('content_type', self.content_type)
+        return self.response_class(
+            request=self.request,
+            template=resolve_template(names) or names,
+            context=context,
+            **response_kwargs
+        )
 
 
 class OppsList(OppsView, ListView):
 
+    # 'offset': numbered pages (Django Paginator)
+    # 'nocount': numbered pages, limit + 1 rows instead of COUNT(*)
+    # 'approximate': numbered pages, cached per channel counts
+    # 'keyset': ?cursor= pages seeking on (date_available, id)
+    paginate_mode = settings.OPPS_PAGINATE_MODE
+    cursor_kwarg = 'cursor'
+
+    cache_fields = ('id', 'site_id', 'slug', 'title', 'short_title', 'hat',
+                    'headline', 'short_url', 'channel_id', 'channel_name',
+                    'channel_long_slug', 'child_class', 'child_app_label',
+                    'main_image_id', 'date_available', 'published')
+
     def get_template_names(self):
         names = []
         domain_folder = self.get_template_folder()
 
         # look for a different template only if defined in settings
         # default should be OPPS_PAGINATE_SUFFIX = "_paginated"
-        if self.request and self.request.GET.get('page'):
+        if self.request and (self.request.GET.get('page') or
+                             self.request.GET.get(self.cursor_kwarg)):
             paginate_suffix = settings.OPPS_PAGINATE_SUFFIX
             self.template_name_suffix = "_list{}".format(paginate_suffix)
         else:
@@ -144,7 +176,7 @@ class OppsList(OppsView, ListView):
 
     @property
     def queryset(self):
-        self.site = get_current_site(self.request)
+        self.site = get_request_site(self.request)
         self.long_slug = self.get_long_slug()
 
         if not self.long_slug:
@@ -152,21 +184,73 @@ class OppsList(OppsView, ListView):
 
         self.set_channel_rules()
 
-        cachekey = _cache_key('list', self.model, self.site,
-                              self.long_slug)
-        get_cache = cache.get(cachekey)
-        if get_cache:
-            return get_cache
-
-        self.article = self.model.objects.filter(
+        self.scheduled = self.model.objects.filter(
             site=self.site,
             channel_long_slug__in=self.channel_long_slug,
-            date_available__lte=timezone.now(),
-            published=True)[:self.limit]
-        cache.set(cachekey, self.article)
+            published=True)
+        self.article = self.scheduled.filter(
+            **self.model.visible_lookups())
+        if self.limit and self.paginate_mode == 'offset':
+            self.article = self.article[:self.limit]
 
+        # lazy, each page is evaluated and cached on its own (load_page)
         return self.article
 
+    def paginate_queryset(self, queryset, page_size):
+        if self.paginate_mode != 'keyset':
+            return super(OppsList, self).paginate_queryset(queryset,
+                                                           page_size)
+
+        cursor = self.request.GET.get(self.cursor_kwarg) or None
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            rows = self.load_page(paginator.get_queryset(cursor), cursor)
+        except ValueError:
+            raise Http404(_(u"Invalid page."))
+
+        page = paginator.page(cursor, rows)
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def get_paginator(self, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True, **kwargs):
+        if self.paginate_mode == 'approximate' and self.channel:
+            count = approximate_count(queryset, self.site,
+                                      self.channel_long_slug)
+            return ApproximateCountPaginator(
+                queryset, per_page, count, orphans, allow_empty_first_page,
+                loader=self.load_page)
+        if self.paginate_mode in ('nocount', 'approximate'):
+            return NoCountPaginator(queryset, per_page, orphans,
+                                    allow_empty_first_page,
+                                    loader=self.load_page)
+        return LoaderPaginator(queryset, per_page, orphans,
+                               allow_empty_first_page, loader=self.load_page)
+
+    def load_page(self, rows, page):
+        """
+        Evaluates the sliced queryset of a single page (number or cursor),
+        through the result cache when listing a channel
+        """
+        if not self.channel:
+            return list(rows)
+        cachekey = _cache_key('list', self.model, self.site, self.long_slug,
+                              self.paginate_mode, page or '',
+                              self.get_paginate_by(None))
+        return cache_objects(cachekey, rows, fields=self.cache_fields,
+                             timeout=transition_expiry(self.scheduled),
+                             related=self.related_fields)
+
+    def get_context_data(self, **kwargs):
+        context = super(OppsList, self).get_context_data(**kwargs)
+        context['paginate_mode'] = self.paginate_mode
+        page = context.get('page_obj')
+        if getattr(page, 'next_cursor', None):
+            query = self.request.GET.copy()
+            query[self.cursor_kwarg] = page.next_cursor
+            query.pop('page', None)
+            context['next_url'] = u'?{}'.format(query.urlencode())
+        return context
+
 
 class OppsDetail(OppsView, DetailView):
 
@@ -187,7 +271,7 @@ class OppsDetail(OppsView, DetailView):
 
     @property
     def queryset(self):
-        self.site = get_current_site(self.request)
+        self.site = get_request_site(self.request)
         self.slug = self.kwargs.get('slug')
         self.long_slug = self.get_long_slug()
         if not self.long_slug:
@@ -195,18 +279,32 @@ class OppsDetail(OppsView, DetailView):
 
         self.set_channel_rules()
 
-        cachekey = _cache_key('detail', self.model, self.site,
-                              "{}-{}".format(self.long_slug, self.slug))
-        get_cache = cache.get(cachekey)
-        if get_cache:
-            return get_cache
-
-        self.article = self.model.objects.filter(
+        self.scheduled = self.model.objects.filter(
             site=self.site,
             channel_long_slug=self.long_slug,
             slug=self.slug,
-            date_available__lte=timezone.now(),
-            published=True).select_related('publisher')
-        cache.set(cachekey, self.article)
+            published=True)
+        cachekey = _cache_key('detail', self.model, self.site,
+                              self.long_slug, self.slug)
+        self.article = cache_objects(
+            cachekey,
+            self.scheduled.filter(**self.model.visible_lookups())[:1],
+            fields=self.cache_fields,
+            timeout=transition_expiry(self.scheduled),
+            related=self.related_fields)
 
         return self.article
+
+    def get_object(self, queryset=None):
+        """
+        queryset is a list of materialized objects (see cache_objects),
+        so it can't be filtered again by DetailView
+        """
+        if queryset is None:
+            queryset = self.queryset
+        if queryset is None:
+            return super(OppsDetail, self).get_object()
+        if not queryset:
+            raise Http404(_(u"No %(verbose_name)s found matching the query")
+                          % {'verbose_name': self.model._meta.verbose_name})
+        return queryset[0]
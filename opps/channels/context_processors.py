@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 from django.utils import timezone
 from django.conf import settings
-from django.contrib.sites.models import get_current_site
+
+from opps.core.sites import get_request_site
 
 from .models import Channel
 
@@ -9,7 +10,7 @@ from .models import Channel
 def channel_context(request):
     """ Channel context processors
     """
-    site = get_current_site(request)
+    site = get_request_site(request)
     opps_menu = Channel.objects.filter(site=site,
                                        date_available__lte=timezone.now(),
                                        published=True,
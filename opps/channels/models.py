@@ -8,6 +8,15 @@ from mptt.managers import TreeManager
 
 from opps.core.models import Publishable, BaseConfig
 from opps.core.models import Slugged
+from opps.core.signals import bulk_published, for_each_published
+
+from .rename import cascade_rename
+from .signals import invalidate_channel_tree
+
+
+# first path segment of routes declared before the channel URLs
+# (opps.articles.urls), a top level channel by that slug would be shadowed
+RESERVED_SLUGS = ('s', 'album', 'tag', 'search')
 
 
 class ChannelManager(TreeManager):
@@ -45,6 +54,9 @@ class Channel(MPTTModel, Publishable, Slugged):
 
     objects = ChannelManager()
 
+    class Meta:
+        index_together = [['site', 'long_slug', 'published']]
+
     class META:
         unique_together = ("site", "long_slug", "slug", "parent")
         verbose_name = _('Channel')
@@ -86,7 +98,7 @@ class Channel(MPTTModel, Publishable, Slugged):
             channel_is_home = Channel.objects.filter(
                 site=self.site.id,
                 homepage=True,
-                published=True).select_related('publisher')
+                published=True)
             if self.pk:
                 channel_is_home = channel_is_home.exclude(pk=self.pk)
         except ObjectDoesNotExist:
@@ -98,17 +110,34 @@ class Channel(MPTTModel, Publishable, Slugged):
         if self.homepage and len(channel_is_home) >= 1:
             raise ValidationError('Exist home page!')
 
+        if not self.parent_id and self.slug in RESERVED_SLUGS:
+            raise ValidationError('Slug reserved for other URLs!')
+
         # every class which implements Slugged needs this in clean
         try:
             super(Channel, self).clean()
         except AttributeError:
             pass  # does not implement the clean method
 
+    def __init__(self, *args, **kwargs):
+        super(Channel, self).__init__(*args, **kwargs)
+        # compared after save, a change is cascaded (see rename.py)
+        self._loaded_path = (self.__dict__.get('long_slug'),
+                             self.__dict__.get('name'))
+
     def save(self, *args, **kwargs):
         self.long_slug = u"{}".format(self.slug)
         if self.parent:
-            self.long_slug = u"{}/{}".format(self.parent.slug, self.slug)
+            self.long_slug = u"{}/{}".format(self.parent.long_slug,
+                                             self.slug)
+        old_long_slug, old_name = self._loaded_path
+        renamed = not self._state.adding and old_long_slug is not None \
+            and (old_long_slug, old_name) != (self.long_slug, self.name)
+
         super(Channel, self).save(*args, **kwargs)
+        self._loaded_path = (self.long_slug, self.name)
+        if renamed:
+            cascade_rename(self, old_long_slug, old_name)
 
 
 class ChannelConfig(BaseConfig):
@@ -116,3 +145,9 @@ class ChannelConfig(BaseConfig):
     Default implementation
     """
     pass
+
+
+models.signals.post_save.connect(invalidate_channel_tree, sender=Channel)
+models.signals.post_delete.connect(invalidate_channel_tree, sender=Channel)
+bulk_published.connect(for_each_published(invalidate_channel_tree),
+                       sender=Channel, weak=False)
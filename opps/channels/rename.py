@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Cascade of a channel rename (slug, name or parent change) to its subtree
+and to the columns other models copy from their channel
+(``channel_long_slug``, ``channel_name``)
+"""
+from django.db import models
+
+from opps.core.cache import bump_generation, invalidate
+from opps.core.models import Slugged, bulk_redirect
+from opps.core.paginator import _count_key
+
+from .signals import CHANNEL_TREE_NAMESPACE
+
+
+def denormalized_models():
+    """
+    models with a ``channel`` foreign key and its ``channel_long_slug``
+    copy (articles, boxes of every app), multi-table children excluded
+    """
+    Channel = models.get_model('channels', 'Channel')
+    result = []
+    for model in models.get_models():
+        fields = dict((f.name, f) for f in model._meta.local_fields)
+        if 'channel_long_slug' in fields and 'channel' in fields and \
+           fields['channel'].rel and fields['channel'].rel.to is Channel:
+            result.append(model)
+    return result
+
+
+def cascade_rename(channel, old_long_slug, old_name):
+    """
+    Called by Channel.save once ``channel`` is saved with a new long_slug
+    or name. Runs in the transaction of the save: a background job could
+    read the channel before it is committed, and would be lost with the
+    process, leaving stale copies behind. The UPDATEs are set based, one
+    per model and channel, so large subtrees stay affordable.
+    """
+    rename_subtree(channel.pk, old_long_slug, old_name)
+
+
+def rename_subtree(pk, old_long_slug, old_name):
+    """
+    Rebuilds the long_slug of every descendant of the channel ``pk`` and
+    updates the copies of the subtree with one UPDATE per model and
+    channel. Redirects from the old channel and article URLs are created
+    in bulk and the caches of the site are dropped once.
+    """
+    Channel = models.get_model('channels', 'Channel')
+    channel = Channel.objects.select_related('site').get(pk=pk)
+    site = channel.site
+
+    # {pk: (old long_slug, new long_slug)}, parents before children
+    paths = {channel.pk: (old_long_slug, channel.long_slug)}
+    new_long_slugs = {channel.pk: channel.long_slug}
+    for child in channel.get_descendants().order_by('tree_id', 'lft'):
+        new_long_slugs[child.pk] = u'{}/{}'.format(
+            new_long_slugs[child.parent_id], child.slug)
+        paths[child.pk] = (child.long_slug, new_long_slugs[child.pk])
+        if child.long_slug != new_long_slugs[child.pk]:
+            Channel.objects.filter(pk=child.pk).update(
+                long_slug=new_long_slugs[child.pk])
+
+    # list pages of the channels, see the channel__long_slug URLs
+    redirects = [(u'/{}/'.format(old), u'/{}/'.format(new))
+                 for old, new in paths.values() if old != new]
+    for model in denormalized_models():
+        for channel_pk, (old, new) in paths.items():
+            values = {'channel_long_slug': new}
+            if channel_pk == channel.pk and old_name != channel.name:
+                values['channel_name'] = channel.name
+            elif old == new:
+                continue
+
+            rows = model._default_manager.filter(channel=channel_pk)
+            if old != new and issubclass(model, Slugged):
+                redirects.extend(moved_urls(model, rows, new))
+            rows.update(**values)
+
+    bulk_redirect(site, redirects)
+
+    # counters of the old paths are stale, new ones are computed on demand
+    invalidate([_count_key(model, site, long_slug)
+                for model in models.get_models()
+                if 'channel_long_slug' in model._meta.get_all_field_names()
+                for path in paths.values() for long_slug in path])
+    bump_generation(site)
+    bump_generation(site, CHANNEL_TREE_NAMESPACE)
+
+
+def moved_urls(model, rows, new_long_slug):
+    """
+    (old URL, new URL) of ``rows`` once moved to ``new_long_slug``, built
+    from their url_fields without loading whole objects
+    """
+    for values in rows.values(*model.url_fields):
+        obj = model(**values)
+        old_url = obj.get_absolute_url()
+        obj.channel_long_slug = new_long_slug
+        yield old_url, obj.get_absolute_url()
+
+
+def normalize_long_slugs():
+    """
+    Rebuilds, through rename_subtree, the long_slug of channels stored
+    under the former rule (parent slug instead of parent long_slug), so
+    that their next save doesn't move them and their articles silently.
+    Returns the number of subtrees fixed.
+    """
+    Channel = models.get_model('channels', 'Channel')
+    expected = {}
+    renamed = []
+    for pk, parent_id, slug, long_slug, name, tree_id, lft, rght in \
+            Channel.objects.order_by('tree_id', 'lft').values_list(
+                'pk', 'parent_id', 'slug', 'long_slug', 'name', 'tree_id',
+                'lft', 'rght'):
+        expected[pk] = slug
+        if parent_id:
+            expected[pk] = u'{}/{}'.format(expected[parent_id], slug)
+        if long_slug == expected[pk] or any(
+                tree_id == t and l < lft < r for t, l, r in renamed):
+            # already right, or rebuilt with an ancestor
+            continue
+        Channel.objects.filter(pk=pk).update(long_slug=expected[pk])
+        rename_subtree(pk, long_slug, name)
+        renamed.append((tree_id, lft, rght))
+    return len(renamed)
@@ -0,0 +1,12 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from opps.core.cache import bump_generation
+
+
+# generation namespace of the in-process channel trees (see tree.py),
+# never clashes with a long_slug
+CHANNEL_TREE_NAMESPACE = u':channels'
+
+
+def invalidate_channel_tree(sender, instance, **kwargs):
+    bump_generation(instance.site, CHANNEL_TREE_NAMESPACE)
@@ -1,2 +1,4 @@
 # -*- coding: utf-8 -*-
 from opps.channels.tests.models import *
+from opps.channels.tests.tree import *
+from opps.channels.tests.rename import *
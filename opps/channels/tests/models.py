@@ -3,6 +3,7 @@
 
 from datetime import timedelta
 
+from django.core.exceptions import ValidationError
 from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.sites.models import Site
@@ -123,3 +124,14 @@ class ChannelModelTest(TestCase):
         channel = Channel.objects.get_homepage(site=self.parent.site)
         self.assertEqual(None, channel)
         self.assertFalse(channel)
+
+    def test_reserved_slug(self):
+        """
+        a top level channel can't take the path of the short URLs
+        """
+        channel = Channel(name=u'S', slug=u's', site=self.site,
+                          user=self.user)
+        self.assertRaises(ValidationError, channel.clean)
+
+        channel.parent = self.parent
+        channel.clean()
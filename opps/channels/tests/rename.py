@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from django.contrib.redirects.models import Redirect
+from django.test import TestCase
+
+from opps.articles.models import Article
+from opps.channels.models import Channel
+from opps.channels.rename import normalize_long_slugs
+
+
+class ChannelRenameTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def setUp(self):
+        self.channel = Channel.objects.get(long_slug=u'channel-01')
+
+    def test_subtree_long_slugs(self):
+        self.channel.slug = u'renamed'
+        self.channel.save()
+
+        self.assertEqual(Channel.objects.get(pk=3).long_slug,
+                         u'renamed/sub-channel-01')
+
+    def test_long_slug_from_parent_path(self):
+        leaf = Channel.objects.create(name=u'leaf', slug=u'leaf',
+                                      parent=Channel.objects.get(pk=3),
+                                      site_id=1, user_id=1)
+        self.assertEqual(leaf.long_slug, u'channel-01/sub-channel-01/leaf')
+
+    def test_articles_follow(self):
+        self.channel.slug = u'renamed'
+        self.channel.name = u'Renamed'
+        self.channel.save()
+
+        self.assertEqual(
+            sorted(Article.objects.filter(channel=self.channel).values_list(
+                'channel_long_slug', 'channel_name')),
+            [(u'renamed', u'Renamed')] * 2)
+        self.assertEqual(
+            Redirect.objects.get(
+                old_path=u'/channel-01/test-post-application').new_path,
+            u'/renamed/test-post-application')
+        self.assertEqual(
+            Redirect.objects.get(
+                old_path=u'/album/channel-01/test-album').new_path,
+            u'/album/renamed/test-album')
+
+    def test_name_only(self):
+        self.channel.name = u'Renamed'
+        self.channel.save()
+
+        self.assertEqual(Article.objects.get(pk=1).channel_name, u'Renamed')
+        self.assertFalse(Redirect.objects.filter(
+            old_path__contains=u'test-post-application').exists())
+
+    def test_channel_pages_redirected(self):
+        self.channel.slug = u'renamed'
+        self.channel.save()
+
+        self.assertEqual(
+            Redirect.objects.get(old_path=u'/channel-01/').new_path,
+            u'/renamed/')
+        self.assertEqual(
+            Redirect.objects.get(
+                old_path=u'/channel-01/sub-channel-01/').new_path,
+            u'/renamed/sub-channel-01/')
+
+    def test_normalize_long_slugs(self):
+        leaf = Channel.objects.create(name=u'leaf', slug=u'leaf',
+                                      parent=Channel.objects.get(pk=3),
+                                      site_id=1, user_id=1)
+        # stored by the former rule, from the parent slug
+        Channel.objects.filter(pk=leaf.pk).update(
+            long_slug=u'sub-channel-01/leaf')
+
+        self.assertEqual(normalize_long_slugs(), 1)
+        self.assertEqual(Channel.objects.get(pk=leaf.pk).long_slug,
+                         u'channel-01/sub-channel-01/leaf')
+        self.assertEqual(
+            Redirect.objects.get(old_path=u'/sub-channel-01/leaf/').new_path,
+            u'/channel-01/sub-channel-01/leaf/')
+        self.assertEqual(normalize_long_slugs(), 0)
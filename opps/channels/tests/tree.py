@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from django.test import TestCase
+from django.contrib.sites.models import Site
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+from mock import patch
+
+from opps.channels.models import Channel
+from opps.channels.tree import get_channel_tree
+
+
+class ChannelTreeTest(TestCase):
+
+    def setUp(self):
+        self.cache = LocMemCache('opps-channels-tests', {})
+        self.cache.clear()
+        patcher = patch('opps.core.cache.cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        User = get_user_model()
+        self.user = User.objects.create(username=u'test', password='test')
+        self.site = Site.objects.filter(name=u'example.com').get()
+        yesterday = timezone.now() - timedelta(days=1)
+        self.home = Channel.objects.create(
+            name=u'Home', slug=u'home', site=self.site, user=self.user,
+            homepage=True, published=True, date_available=yesterday)
+        self.sports = Channel.objects.create(
+            name=u'Sports', slug=u'sports', site=self.site, user=self.user,
+            parent=self.home, published=True, date_available=yesterday)
+        self.soccer = Channel.objects.create(
+            name=u'Soccer', slug=u'soccer', site=self.site, user=self.user,
+            parent=self.sports, published=True, date_available=yesterday)
+        self.hidden = Channel.objects.create(
+            name=u'Hidden', slug=u'hidden', site=self.site, user=self.user,
+            parent=self.home, published=False, date_available=yesterday)
+
+    def test_lookup_without_queries(self):
+        get_channel_tree(self.site)
+        with self.assertNumQueries(0):
+            tree = get_channel_tree(self.site)
+            node = tree.get(self.sports.long_slug)
+        self.assertEqual(node.id, self.sports.id)
+        self.assertEqual(node.get_root().id, self.home.id)
+        self.assertEqual(tree.homepage.id, self.home.id)
+
+    def test_unpublished_is_not_resolved(self):
+        self.assertEqual(get_channel_tree(self.site).get(u'hidden'), None)
+
+    def test_descendants(self):
+        node = get_channel_tree(self.site).get(u'home')
+        self.assertEqual(set(n.id for n in node.descendants),
+                         set([self.sports.id, self.soccer.id,
+                              self.hidden.id]))
+        self.assertEqual(set(n.id for n in node.children),
+                         set([self.sports.id, self.hidden.id]))
+
+    def test_rebuilt_on_channel_save(self):
+        get_channel_tree(self.site)
+        self.hidden.published = True
+        self.hidden.save()
+        self.assertEqual(get_channel_tree(self.site).get(u'home/hidden').id,
+                         self.hidden.id)
+
+    def test_subtree_long_slugs(self):
+        node = get_channel_tree(self.site).get(u'home')
+        self.assertEqual(node.subtree_long_slugs, (
+            self.home.long_slug, self.sports.long_slug,
+            self.soccer.long_slug))
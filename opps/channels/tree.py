@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Per process, per site snapshot of the channel tree, so resolving the
+channel of a request costs no database query. Snapshots are rebuilt (one
+query) when the version stamp stored in the cache changes, which happens
+on every Channel save or delete.
+"""
+from django.utils import timezone
+
+from opps.core.cache import get_generations
+
+from .models import Channel
+from .signals import CHANNEL_TREE_NAMESPACE
+
+
+FIELDS = ('id', 'site_id', 'name', 'slug', 'long_slug', 'description',
+          'parent_id', 'tree_id', 'lft', 'rght', 'level', 'order', 'group',
+          'show_in_menu', 'include_in_main_rss', 'homepage', 'published',
+          'date_available')
+
+_trees = {}
+
+
+class ChannelNode(object):
+    """
+    Read only copy of a Channel, exposing the attributes and tree methods
+    used by views and templates
+    """
+    __slots__ = FIELDS + ('parent', 'children', 'descendants',
+                          'subtree_long_slugs')
+
+    def __init__(self, **values):
+        for field in FIELDS:
+            object.__setattr__(self, field, values[field])
+        object.__setattr__(self, 'parent', None)
+        object.__setattr__(self, 'children', [])
+        object.__setattr__(self, 'descendants', [])
+        object.__setattr__(self, 'subtree_long_slugs', ())
+
+    def __setattr__(self, name, value):
+        raise AttributeError(u"ChannelNode is read only")
+
+    def __unicode__(self):
+        if self.parent:
+            return u"/{}/{}/".format(self.parent.slug, self.slug)
+        return u"/{}/".format(self.slug)
+
+    def __repr__(self):
+        return '<ChannelNode: {}>'.format(self.long_slug)
+
+    @property
+    def title(self):
+        return self.name
+
+    def get_absolute_url(self):
+        return self.__unicode__()
+
+    def get_level(self):
+        return self.level
+
+    def get_root(self):
+        node = self
+        while node.parent:
+            node = node.parent
+        return node
+
+    def get_children(self):
+        return self.children
+
+    def is_leaf_node(self):
+        return not self.children
+
+    def is_published(self):
+        return bool(self.published and self.date_available and
+                    self.date_available <= timezone.now())
+
+
+class ChannelTree(object):
+
+    def __init__(self, site, version):
+        self.site = site
+        self.version = version
+        self.nodes = {}
+        self.by_long_slug = {}
+        self.homepage = None
+
+        rows = Channel.objects.filter(site=site).order_by(
+            'tree_id', 'lft').values(*FIELDS)
+        ordered = []
+        for row in rows:
+            node = ChannelNode(**row)
+            self.nodes[node.id] = node
+            ordered.append(node)
+            if node.published:
+                self.by_long_slug[node.long_slug] = node
+                if node.homepage and not self.homepage:
+                    self.homepage = node
+
+        for i, node in enumerate(ordered):
+            parent = self.nodes.get(node.parent_id)
+            if parent:
+                object.__setattr__(node, 'parent', parent)
+                parent.children.append(node)
+            # MPTT: descendants follow the node until lft passes its rght
+            for other in ordered[i + 1:]:
+                if other.tree_id != node.tree_id or other.lft > node.rght:
+                    break
+                node.descendants.append(other)
+
+        for node in ordered:
+            object.__setattr__(node, 'children', tuple(node.children))
+            object.__setattr__(node, 'descendants', tuple(node.descendants))
+            # channel_long_slug values listed on the channel page: itself
+            # and every published channel of its subtree
+            subtree = [node.long_slug]
+            for other in node.descendants:
+                if other.published and other.long_slug not in subtree:
+                    subtree.append(other.long_slug)
+            object.__setattr__(node, 'subtree_long_slugs', tuple(subtree))
+
+    def get(self, long_slug):
+        """
+        published and available channel of ``long_slug`` or None
+        """
+        node = self.by_long_slug.get(long_slug)
+        if node and node.is_published():
+            return node
+        return None
+
+
+def get_channel_tree(site):
+    version = tuple(get_generations(site, CHANNEL_TREE_NAMESPACE))
+    if None in version:
+        # cache backend doesn't store anything (DummyCache), changes would
+        # never be noticed so the snapshot can't be kept
+        return ChannelTree(site, version)
+
+    tree = _trees.get(site.id)
+    if tree is None or tree.version != version:
+        tree = ChannelTree(site, version)
+        _trees[site.id] = tree
+    return tree
@@ -12,15 +12,35 @@ class OppsCoreConf(AppConf):
     DEFAULT_URLS = ('127.0.0.1', 'localhost',)
     SHORT = 'googl'
     SHORT_URL = 'googl.short.GooglUrlShort'
+    SHORT_URL_BACKEND = 'opps.core.shortener.GooglShortener'
+    TASKS_EAGER = False
     CHANNEL_CONF = {}
     VIEWS_LIMIT = None
     PAGINATE_BY = 10
     PAGINATE_SUFFIX = ''
+    PAGINATE_MODE = 'offset'
+    PAGINATE_COUNT_EXPIRE = 60 * 60
     CHECK_MOBILE = False
+    MOBILE_CACHE_SIZE = 4096
+    SITE_TEMPLATE_DIRS = {}
+    TEMPLATE_CACHE_SIZE = 1000
+    TEMPLATE_NAMES_CACHE_SIZE = 10000
     ADMIN_RULES = {}
     RELATED_POSTS_PLACEHOLDER = "---related---"
     CACHE_PREFIX = 'opps'
     CACHE_EXPIRE = 300
+    CACHE_GENERATION_EXPIRE = 60 * 60 * 24 * 30
+    CACHE_STALE_EXPIRE = 60
+    CACHE_LOCK_EXPIRE = 10
+    CACHE_LOCK_WAIT = 0.05
+    PAGE_CACHE_EXPIRE = {
+        'feed': 60 * 2,
+        'tag': 60 * 2,
+        'flatpage': 60 * 2,
+        'sitemap': 60 * 60 * 24,
+    }
+    PUBLISH_SCHEDULER = False
+    PUBLISH_SCHEDULER_INTERVAL = 60
     RSS_LINK_TEMPLATE = '<a href="{}" class="ir ico ico-rss">RSS</a>'
 
     class Meta:
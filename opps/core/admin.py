@@ -3,11 +3,14 @@
 from django.contrib import admin
 from django.utils import timezone
 from django.conf import settings
-from django.contrib.sites.models import Site
 from django.contrib.auth import get_user_model
 from django.utils.translation import ugettext_lazy as _
+from django.utils.translation import ungettext
 from django.contrib.admin import SimpleListFilter
 
+from .models import bulk_publish
+from .sites import get_request_site
+
 
 class PublishableAdmin(admin.ModelAdmin):
     """
@@ -20,19 +23,35 @@ class PublishableAdmin(admin.ModelAdmin):
     search_fields = ['title', 'slug', 'headline', 'channel_name']
     exclude = ('user',)
 
-    actions = ['publish']
+    actions = ['publish', 'schedule', 'unpublish']
 
     def publish(modeladmin, request, queryset):
-        for obj in queryset:
-            obj.published = not obj.published
-            obj.save()
-    publish.short_description = _(u'Publish/Unpublish')
+        count = bulk_publish(queryset)
+        modeladmin.message_user(request, ungettext(
+            u'%(count)d item published',
+            u'%(count)d items published', count) % {'count': count})
+    publish.short_description = _(u'Publish now')
+
+    def schedule(modeladmin, request, queryset):
+        count = bulk_publish(queryset, schedule=True)
+        modeladmin.message_user(request, ungettext(
+            u'%(count)d item scheduled on its date available',
+            u'%(count)d items scheduled on their date available',
+            count) % {'count': count})
+    schedule.short_description = _(u'Publish on date available')
+
+    def unpublish(modeladmin, request, queryset):
+        count = bulk_publish(queryset, publish=False)
+        modeladmin.message_user(request, ungettext(
+            u'%(count)d item unpublished',
+            u'%(count)d items unpublished', count) % {'count': count})
+    unpublish.short_description = _(u'Unpublish')
 
     def save_model(self, request, obj, form, change):
         if getattr(obj, 'pk', None) is None:
             obj.user = get_user_model().objects.get(pk=request.user.pk)
             obj.date_insert = timezone.now()
-            obj.site = Site.objects.get(pk=settings.SITE_ID)
+            obj.site = get_request_site(request)
         obj.date_update = timezone.now()
         obj.save()
 
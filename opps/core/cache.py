@@ -1,13 +1,271 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import hashlib
+import math
+import random
+import time
 from django.conf import settings
-from base64 import b64encode
+from django.core.cache import cache
+from django.db.models import Min
+from django.db.models.query import prefetch_related_objects
+from django.db.models.query_utils import deferred_class_factory
+from django.utils import timezone
 
 
-def _cache_key(_type, model, site, channel_long_slug):
-    return b64encode((u'{}:{}:{}:{}:{}'.format(
-        _type,
-        settings.OPPS_CACHE_PREFIX,
-        model._meta.db_table,
-        site,
-        channel_long_slug)).replace(' ', ''))
+# memcached refuses keys over 250 bytes, leave room for KEY_PREFIX/VERSION
+READABLE_KEY_LENGTH = 150
+
+
+def make_key(readable, *components):
+    """
+    Builds a fixed length key: ``readable`` is kept (truncated, without
+    spaces) for debugging and followed by a md5 digest of ``components``.
+    Components are length prefixed, so ('a:b', 'c') and ('a', 'b:c') never
+    produce the same key.
+    """
+    raw = u''.join(u'{}:{}|'.format(len(c), c)
+                   for c in (u'{}'.format(c) for c in components))
+    return u'{}:{}'.format(
+        readable.replace(' ', '')[:READABLE_KEY_LENGTH],
+        hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+
+def _generation_key(site, channel_long_slug=None):
+    return make_key(u'{}:generation'.format(settings.OPPS_CACHE_PREFIX),
+                    site, channel_long_slug or '')
+
+
+def _new_generation():
+    # time based, so a generation evicted from the cache never comes back
+    # with a value already used by keys still stored
+    return int(time.time() * 1000)
+
+
+def get_generations(site, channel_long_slug):
+    """
+    Returns the current (site, channel) generations, creating the missing
+    ones. Every key built by ``_cache_key`` embeds both numbers.
+    """
+    keys = [_generation_key(site), _generation_key(site, channel_long_slug)]
+    found = cache.get_many(keys)
+    generations = []
+    for key in keys:
+        if key not in found:
+            cache.add(key, _new_generation(),
+                      settings.OPPS_CACHE_GENERATION_EXPIRE)
+            found[key] = cache.get(key)
+        generations.append(found[key])
+    return generations
+
+
+def bump_generation(site, channel_long_slug=None):
+    """
+    Invalidates in O(1) every key of ``channel_long_slug`` or, when not
+    given, every key of the whole ``site``
+    """
+    key = _generation_key(site, channel_long_slug)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_generation(),
+                  settings.OPPS_CACHE_GENERATION_EXPIRE)
+
+
+# generation namespace of the main feed (every channel in main RSS)
+FEED_NAMESPACE = u':feed'
+
+
+def box_namespace(slug):
+    """
+    generation namespace of the fragments rendered for the box ``slug``,
+    never clashes with a long_slug
+    """
+    return u':box:{}'.format(slug)
+
+
+def invalidate_box(site, slug, channel_long_slug=None):
+    """
+    Drops the rendered fragments of the box ``slug`` and, when given, of
+    all boxes of ``channel_long_slug``
+    """
+    bump_generation(site, box_namespace(slug))
+    if channel_long_slug:
+        bump_generation(site, channel_long_slug)
+
+
+def _cache_key(_type, model, site, channel_long_slug, *dimensions,
+               **named_dimensions):
+    """
+    Key of a cached ``model`` result for ``site`` and ``channel_long_slug``,
+    varying on any extra ``dimensions`` (page number, mobile flag, ...)
+    given positionally or by name
+    """
+    site_generation, channel_generation = get_generations(
+        site, channel_long_slug)
+    named = [u'{}={}'.format(k, v)
+             for k, v in sorted(named_dimensions.items())]
+    return make_key(
+        u'{}:{}:{}'.format(settings.OPPS_CACHE_PREFIX, _type,
+                           model._meta.db_table),
+        site, channel_long_slug, site_generation, channel_generation,
+        *(list(dimensions) + named))
+
+
+def materialize(queryset, fields=None):
+    """
+    Evaluates ``queryset`` into a list of plain dicts (one per row) holding
+    only ``fields``, all concrete fields by default. The primary key is
+    always kept so rows can be turned back into model instances.
+    """
+    if fields:
+        pk = queryset.model._meta.pk.attname
+        fields = [pk] + [f for f in fields if f != pk]
+        return list(queryset.values(*fields))
+    return list(queryset.values())
+
+
+def hydrate(model, rows, using=None):
+    """
+    Rebuilds ``model`` instances from rows returned by ``materialize``
+    without touching the database. Fields left out of the rows are deferred
+    and loaded on first access, just like ``QuerySet.only``.
+    """
+    if not rows:
+        return []
+
+    klass = model
+    skip = set(f.attname for f in model._meta.fields) - set(rows[0])
+    if skip:
+        klass = deferred_class_factory(model, skip)
+
+    objects = []
+    for row in rows:
+        obj = klass(**row)
+        obj._state.adding = False
+        obj._state.db = using
+        objects.append(obj)
+    return objects
+
+
+def next_transition(queryset, *fields):
+    """
+    Earliest future value of the datetime ``fields`` among the rows of
+    ``queryset``: the moment an item of a cached result appears or drops
+    out. None when nothing is scheduled.
+    """
+    now = timezone.now()
+    # one MIN() per field, each served by the date indexes
+    dates = [queryset.filter(**{'{}__gt'.format(field): now}).aggregate(
+             date=Min(field))['date'] for field in fields]
+    dates = [date for date in dates if date]
+    return min(dates) if dates else None
+
+
+def transition_timeout(transitions, timeout=None):
+    """
+    Caps ``timeout`` (``OPPS_CACHE_EXPIRE`` by default) to the seconds left
+    until the earliest of ``transitions`` (datetimes, None is ignored)
+    """
+    timeout = timeout or settings.OPPS_CACHE_EXPIRE
+    now = timezone.now()
+    upcoming = [date for date in transitions if date and date > now]
+    if upcoming:
+        seconds = int(math.ceil((min(upcoming) - now).total_seconds()))
+        timeout = max(1, min(timeout, seconds))
+    return timeout
+
+
+def transition_expiry(queryset, fields=('date_available',), timeout=None):
+    """
+    Lazy timeout for ``cache_fetch`` and ``cache_objects``: ``timeout``
+    capped to the next transition of ``fields`` among ``queryset``, only
+    looked up when the entry is (re)computed
+    """
+    return lambda: transition_timeout([next_transition(queryset, *fields)],
+                                      timeout)
+
+
+def _store(cachekey, callback, timeout):
+    start = time.time()
+    value = callback()
+    delta = time.time() - start
+    if callable(timeout):
+        # decided once the value is known, see transition_timeout
+        timeout = timeout()
+    # kept OPPS_CACHE_STALE_EXPIRE seconds after its expiry so it can be
+    # served while a single worker recomputes it
+    cache.set(cachekey, (value, start + timeout, delta),
+              timeout + settings.OPPS_CACHE_STALE_EXPIRE)
+    return value
+
+
+def cache_fetch(cachekey, callback, timeout=None, beta=1.0):
+    """
+    Returns the value stored under ``cachekey``, calling ``callback`` to
+    compute it when missing or expired. ``timeout`` may be a callable,
+    called after ``callback``. Protected from cache stampedes:
+
+    - only the worker holding a short lock (``OPPS_CACHE_LOCK_EXPIRE``)
+      recomputes an entry, others wait for it or serve the stale value
+    - entries close to expiry are refreshed early with a probability that
+      grows as expiry approaches and with the time ``callback`` takes
+      (``beta`` > 1 favours earlier refreshes)
+    """
+    timeout = timeout or settings.OPPS_CACHE_EXPIRE
+    lock = u'{}:lock'.format(cachekey)
+
+    entry = cache.get(cachekey)
+    if entry is not None:
+        value, expire_at, delta = entry
+        if time.time() - delta * beta * math.log(
+                1.0 - random.random()) < expire_at:
+            return value
+        if not cache.add(lock, 1, settings.OPPS_CACHE_LOCK_EXPIRE):
+            # someone else is already refreshing it
+            return value
+        try:
+            return _store(cachekey, callback, timeout)
+        finally:
+            cache.delete(lock)
+
+    if cache.add(lock, 1, settings.OPPS_CACHE_LOCK_EXPIRE):
+        try:
+            return _store(cachekey, callback, timeout)
+        finally:
+            cache.delete(lock)
+
+    deadline = time.time() + settings.OPPS_CACHE_LOCK_EXPIRE
+    while time.time() < deadline:
+        time.sleep(settings.OPPS_CACHE_LOCK_WAIT)
+        entry = cache.get(cachekey)
+        if entry is not None:
+            return entry[0]
+
+    # lock holder died or is too slow, give up waiting
+    return _store(cachekey, callback, timeout)
+
+
+def cache_objects(cachekey, queryset, fields=None, timeout=None,
+                  related=None):
+    """
+    Returns the objects of ``queryset`` as a list, storing the evaluated rows
+    (not the lazy QuerySet) under ``cachekey`` for ``timeout`` seconds,
+    ``OPPS_CACHE_EXPIRE`` by default (see ``transition_expiry``).
+    ``related`` lookups are loaded for the whole list at once (one query
+    each), like ``prefetch_related``.
+    """
+    rows = cache_fetch(cachekey, lambda: materialize(queryset, fields),
+                       timeout)
+    objects = hydrate(queryset.model, rows, using=queryset.db)
+    if related and objects:
+        prefetch_related_objects(objects, list(related))
+    return objects
+
+
+def invalidate(keys):
+    """
+    Deletes every key in ``keys`` in a single ``delete_many`` round trip
+    """
+    keys = list(set(keys))
+    if keys:
+        cache.delete_many(keys)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_response_headers, patch_vary_headers
+from django.utils.decorators import available_attrs
+
+from opps.core.cache import get_generations, make_key
+from opps.core.sites import get_request_site
+from opps.core.utils import is_mobile
+
+
+# query string parameters a cached page varies on, any other is ignored
+PAGE_PARAMS = ('page', 'cursor')
+
+
+def page_cache_timeout(route):
+    """
+    ``OPPS_PAGE_CACHE_EXPIRE[route]``, ``OPPS_CACHE_EXPIRE`` for routes
+    not listed
+    """
+    return settings.OPPS_PAGE_CACHE_EXPIRE.get(route,
+                                               settings.OPPS_CACHE_EXPIRE)
+
+
+def page_cache_key(request, params=PAGE_PARAMS):
+    """
+    Key of the page of ``request``: site (and its generation), device
+    class, path and pagination parameters. Not the User-Agent, every
+    browser version would get its own copy.
+    """
+    site = get_request_site(request)
+    site_generation, _ = get_generations(site, None)
+    return make_key(u'{}:page'.format(settings.OPPS_CACHE_PREFIX),
+                    site, site_generation, request.method,
+                    u'mobile={}'.format(is_mobile(request)),
+                    request.path,
+                    *[u'{}={}'.format(param, request.GET.get(param, ''))
+                      for param in params])
+
+
+def cache_page(route, params=PAGE_PARAMS):
+    """
+    Full page cache of a view, replaces django's cache_page in the
+    URLconfs: ``cache_page('feed')(ArticleFeed())``. The timeout is read
+    from ``OPPS_PAGE_CACHE_EXPIRE`` on each request, 0 turns the cache off
+    for the route.
+    """
+    def decorator(view):
+        @wraps(view, assigned=available_attrs(view))
+        def wrapper(request, *args, **kwargs):
+            timeout = page_cache_timeout(route)
+            if not timeout or request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            cachekey = page_cache_key(request, params)
+            response = cache.get(cachekey)
+            if response is not None:
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200 or response.cookies:
+                return response
+
+            def store(response):
+                patch_response_headers(response, timeout)
+                if settings.OPPS_CHECK_MOBILE:
+                    # other caches can't tell the device class apart
+                    patch_vary_headers(response, ('User-Agent',))
+                cache.set(cachekey, response, timeout)
+
+            if getattr(response, 'is_rendered', True):
+                store(response)
+            else:
+                # TemplateResponse, stored once the middlewares are done
+                response.add_post_render_callback(store)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template, get_template_from_string
+from django.template.loaders.app_directories import app_template_dirs
+from django.template.loaders.cached import Loader as BaseCachedLoader
+from django.template.loaders.filesystem import Loader as FilesystemLoader
+
+from opps.core.sites import get_active_site, active_is_mobile
+from opps.core.utils import LRUCache
+
+
+# {(site, device, candidate names): (signature, name found or None)}
+resolved_templates = LRUCache(settings.OPPS_TEMPLATE_NAMES_CACHE_SIZE)
+# {(site, device, name): template}, one compiled copy per template found,
+# however many candidate lists lead to it
+compiled_templates = LRUCache(settings.OPPS_TEMPLATE_CACHE_SIZE)
+
+
+def active_template_dirs():
+    """
+    Template directories of the request served by the current thread:
+    ``OPPS_SITE_TEMPLATE_DIRS[domain]`` of its site first, then
+    TEMPLATE_DIRS_MOBILE or TEMPLATE_DIRS_WEB by device, TEMPLATE_DIRS
+    when those are not set
+    """
+    dirs = []
+    site = get_active_site()
+    if site is not None:
+        dirs.extend(settings.OPPS_SITE_TEMPLATE_DIRS.get(site.domain, ()))
+    if active_is_mobile():
+        dirs.extend(getattr(settings, 'TEMPLATE_DIRS_MOBILE',
+                            settings.TEMPLATE_DIRS))
+    else:
+        dirs.extend(getattr(settings, 'TEMPLATE_DIRS_WEB',
+                            settings.TEMPLATE_DIRS))
+    return dirs
+
+
+def _loader_names(loaders):
+    # TEMPLATE_LOADERS entries, those wrapped by a cached loader included
+    for loader in loaders:
+        if isinstance(loader, (list, tuple)):
+            yield loader[0]
+            for args in loader[1:]:
+                if isinstance(args, (list, tuple)):
+                    for name in _loader_names(args):
+                        yield name
+        else:
+            yield loader
+
+
+def check_template_loaders():
+    """
+    Raises ImproperlyConfigured when TEMPLATE_DIRS_MOBILE,
+    TEMPLATE_DIRS_WEB or OPPS_SITE_TEMPLATE_DIRS are set and no Loader
+    in TEMPLATE_LOADERS reads them, the stock loaders ignore them
+    """
+    if not (getattr(settings, 'TEMPLATE_DIRS_MOBILE', None) or
+            getattr(settings, 'TEMPLATE_DIRS_WEB', None) or
+            settings.OPPS_SITE_TEMPLATE_DIRS):
+        return
+    if 'opps.core.loaders.Loader' not in _loader_names(
+            settings.TEMPLATE_LOADERS):
+        raise ImproperlyConfigured(
+            "TEMPLATE_DIRS_MOBILE, TEMPLATE_DIRS_WEB and "
+            "OPPS_SITE_TEMPLATE_DIRS are read by "
+            "'opps.core.loaders.Loader', add it to TEMPLATE_LOADERS in "
+            "place of 'django.template.loaders.filesystem.Loader'")
+
+
+class Loader(FilesystemLoader):
+    """
+    Filesystem loader over active_template_dirs(), replaces
+    django.template.loaders.filesystem.Loader in TEMPLATE_LOADERS.
+    Wrap it in CachedLoader, not in django's cached loader: that one
+    caches by template name only.
+    """
+    is_usable = True
+
+    def get_template_sources(self, template_name, template_dirs=None):
+        return super(Loader, self).get_template_sources(
+            template_name, template_dirs or active_template_dirs())
+
+
+class CachedLoader(BaseCachedLoader):
+    """
+    django.template.loaders.cached.Loader keyed on the site and device of
+    the current thread too, the same name is a different file for each::
+
+        TEMPLATE_LOADERS = (
+            ('opps.core.loaders.CachedLoader', (
+                'opps.core.loaders.Loader',
+                'django.template.loaders.app_directories.Loader',
+            )),
+        )
+
+    At most ``OPPS_TEMPLATE_CACHE_SIZE`` compiled templates are kept.
+    """
+
+    def __init__(self, loaders):
+        super(CachedLoader, self).__init__(loaders)
+        self.template_cache = LRUCache(settings.OPPS_TEMPLATE_CACHE_SIZE)
+
+    def load_template(self, template_name, template_dirs=None):
+        site = get_active_site()
+        key = (site and site.pk, active_is_mobile(), template_name,
+               tuple(template_dirs or ()))
+
+        def compute(key):
+            template, origin = self.find_template(template_name,
+                                                  template_dirs)
+            if not hasattr(template, 'render'):
+                template = get_template_from_string(template, origin,
+                                                    template_name)
+            return template
+
+        try:
+            return self.template_cache.get(key, compute), None
+        except TemplateDoesNotExist:
+            # missing, or an {% extends %}/{% include %} of it is: like
+            # django's cached loader, the source is returned, not cached
+            return self.find_template(template_name, template_dirs)
+
+
+def _templates_signature(names):
+    """
+    In DEBUG, mtimes of the files the ``names`` would be found in, None
+    for the missing ones: a template added, removed or edited changes it.
+    None when not in DEBUG, templates only change with a deploy (and a
+    restart).
+    """
+    if not settings.DEBUG:
+        return None
+    roots = (list(active_template_dirs()) + list(settings.TEMPLATE_DIRS) +
+             list(app_template_dirs))
+    signature = []
+    for path in [os.path.join(root, name) for name in names
+                 for root in roots]:
+        try:
+            signature.append(os.stat(path).st_mtime)
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def resolve_template(names):
+    """
+    First of the template ``names`` that exists, compiled (None when
+    none does). The name found is remembered per site and device so the
+    loaders are searched once for the same candidates, misses included,
+    and the template compiled once per name; render the template
+    returned instead of the names, or they are searched again.
+    """
+    site = get_active_site()
+    active = (site and site.pk, active_is_mobile())
+    signature = _templates_signature(names)
+
+    def compute(key):
+        for name in names:
+            try:
+                template = get_template(name)
+            except TemplateDoesNotExist:
+                continue
+            compiled_templates.set(active + (name,), template)
+            return signature, name
+        return signature, None
+
+    key = active + (tuple(names),)
+    cached_signature, name = resolved_templates.get(key, compute)
+    if cached_signature != signature:
+        cached_signature, name = compute(key)
+        resolved_templates.set(key, (cached_signature, name))
+    if name is None:
+        return None
+    return compiled_templates.get(active + (name,),
+                                  lambda key: get_template(name))
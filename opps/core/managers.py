@@ -1,10 +1,24 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
+from .sites import get_active_site
+
 
 class PublishableManager(models.Manager):
     def all_published(self):
         return super(PublishableManager, self).get_query_set().filter(
             date_available__lte=timezone.now(), published=True)
+
+
+class ActiveSiteManager(models.Manager):
+    """
+    CurrentSiteManager on the site of the request served by the current
+    thread (opps.core.sites), SITE_ID outside a request
+    """
+    def get_query_set(self):
+        site = get_active_site()
+        return super(ActiveSiteManager, self).get_query_set().filter(
+            site__id__exact=site.pk if site else settings.SITE_ID)
@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 import re
-from django.contrib.sites.models import Site
-from django.contrib.sites.models import get_current_site
-
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject
 
 from opps.channels.models import Channel
+from opps.channels.tree import get_channel_tree
+from opps.core.sites import get_request_site, get_site_by_host, split_host
+from opps.core.loaders import check_template_loaders
+from opps.core.sites import activate
+from opps.core.utils import LRUCache
 
 
 class URLMiddleware(object):
@@ -15,7 +18,7 @@ class URLMiddleware(object):
         will force the ROOT_URLCONF = 'yourproject.urls_2.py'
         """
         self.request = request
-        site = get_current_site(request)
+        site = get_request_site(request)
         if site.id > 1:
             prefix = "_{0}".format(site.id)
             self.request.urlconf = settings.ROOT_URLCONF + prefix
@@ -28,38 +31,41 @@ class TemplateContextMiddleware(object):
     def process_template_response(self, request, response):
         if hasattr(response, 'context_data'):
             if not 'channel' in response.context_data:
-                site = get_current_site(request)
-                response.context_data['channel'] = Channel.objects\
-                        .get_homepage(site=site or Site.objects.get(pk=1))
+                response.context_data['channel'] = self.get_homepage(
+                    get_request_site(request))
         return response
 
+    def get_homepage(self, site):
+        """
+        The homepage Channel, found in the channel tree and only loaded
+        (one query) when the template uses it
+        """
+        node = get_channel_tree(site).homepage
+        if node is None:
+            return None
+        return SimpleLazyObject(lambda: Channel.objects.get(pk=node.id))
+
 
 class DynamicSiteMiddleware(object):
+    """
+    Site of the request by its host, on ``request.site`` and the current
+    thread (``opps.core.sites.activate``). settings.SITE_ID is left alone,
+    it is shared by every thread of the process.
+    """
 
-    def hosting_parse(self, hosting):
-        """
-        Returns ``(host, port)`` for ``hosting`` of the form ``'host:port'``.
+    def __init__(self):
+        check_template_loaders()
 
-        If hosting does not have a port number, ``port`` will be None.
-        """
-        if ':' in hosting:
-            return hosting.rsplit(':', 1)
-        return hosting, None
+    def hosting_parse(self, hosting):
+        return split_host(hosting)
 
     def get_hosting(self, hosting):
-        domain, port = self.hosting_parse(hosting)
-        if domain in settings.OPPS_DEFAULT_URLS:
-            domain = 'example.com'
-        try:
-            return Site.objects.get(domain=domain)
-        except Site.DoesNotExist:
-            return Site.objects.all()[0]
+        # in-process host map, no query once the host is known
+        return get_site_by_host(hosting)
 
     def process_request(self, request):
-        hosting = request.get_host().lower()
-        site = self.get_hosting(hosting)
-
-        settings.SITE_ID = site.id
+        request.site = self.get_hosting(request.get_host())
+        activate(site=request.site)
 
 
 class MobileDetectionMiddleware(object):
@@ -67,6 +73,9 @@ class MobileDetectionMiddleware(object):
 
     https://github.com/gregmuellegger/django-mobile/blob/3093a9791e5e812021e49
     3226e5393033115c8bf/django_mobile/middleware.py
+
+    The device is set on the current thread, opps.core.loaders.Loader picks
+    TEMPLATE_DIRS_MOBILE or TEMPLATE_DIRS_WEB from it.
     """
 
     user_agents_test_match = (
@@ -96,35 +105,31 @@ class MobileDetectionMiddleware(object):
     http_accept_regex = re.compile("application/vnd\.wap\.xhtml\+xml",
                                    re.IGNORECASE)
 
+    # the three tests above as one pattern: a known prefix, or a keyword
+    # anywhere in a user agent without an exception
+    user_agents_regex = re.compile(
+        u'^(?:%s)|^(?!.*%s).*?%s' % (u'|'.join(user_agents_test_match),
+                                     user_agents_exception_search,
+                                     user_agents_test_search),
+        re.IGNORECASE | re.DOTALL)
+
     def __init__(self):
-        user_agents_test_match = r'^(?:%s)' % '|'.join(
-            self.user_agents_test_match)
-        self.user_agents_test_match_regex = re.compile(
-            user_agents_test_match, re.IGNORECASE)
-        self.user_agents_test_search_regex = re.compile(
-            self.user_agents_test_search, re.IGNORECASE)
-        self.user_agents_exception_search_regex = re.compile(
-            self.user_agents_exception_search, re.IGNORECASE)
+        check_template_loaders()
+        # the same few thousand user agents come back all the time
+        self.decisions = LRUCache(settings.OPPS_MOBILE_CACHE_SIZE)
+
+    def is_mobile_agent(self, user_agent):
+        return self.decisions.get(
+            user_agent, lambda key: bool(self.user_agents_regex.match(key)))
 
     def process_request(self, request):
         is_mobile = False
 
-        if 'HTTP_USER_AGENT' in request.META:
-            user_agent = request.META['HTTP_USER_AGENT']
-
-            if self.user_agents_test_search_regex.search(user_agent) and \
-               not self.user_agents_exception_search_regex.search(user_agent):
-                is_mobile = True
-            else:
-                if 'HTTP_ACCEPT' in request.META:
-                    http_accept = request.META['HTTP_ACCEPT']
-                    if self.http_accept_regex.search(http_accept):
-                        is_mobile = True
-
-            if not is_mobile:
-                if self.user_agents_test_match_regex.match(user_agent):
-                    is_mobile = True
-
-        settings.TEMPLATE_DIRS = settings.TEMPLATE_DIRS_WEB
-        if is_mobile and settings.OPPS_CHECK_MOBILE:
-            settings.TEMPLATE_DIRS = settings.TEMPLATE_DIRS_MOBILE
+        if settings.OPPS_CHECK_MOBILE and 'HTTP_USER_AGENT' in request.META:
+            is_mobile = self.is_mobile_agent(
+                request.META['HTTP_USER_AGENT']) or bool(
+                self.http_accept_regex.search(
+                    request.META.get('HTTP_ACCEPT', '')))
+
+        request.is_mobile = is_mobile
+        activate(is_mobile=request.is_mobile)
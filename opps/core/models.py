@@ -6,11 +6,15 @@ from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
 from django.core.exceptions import ValidationError
 from django.contrib.sites.models import Site
-from django.contrib.sites.managers import CurrentSiteManager
 from django.contrib.redirects.models import Redirect
+from django.core.signals import request_finished
 from django.utils import timezone
 
-from .managers import PublishableManager
+from .managers import PublishableManager, ActiveSiteManager
+from .signals import invalidate_box_cache, bulk_published
+from .signals import for_each_published
+from .sites import clear_site_cache, deactivate
+from .tasks import run_pending
 
 
 class Date(models.Model):
@@ -31,11 +35,23 @@ class Publishable(Date):
     published = models.BooleanField(_(u"Published"), default=False)
 
     objects = PublishableManager()
-    on_site = CurrentSiteManager()
+    on_site = ActiveSiteManager()
 
     class Meta:
         abstract = True
 
+    def __init__(self, *args, **kwargs):
+        super(Publishable, self).__init__(*args, **kwargs)
+        # visibility when loaded, signals compare it after save to detect
+        # publish/unpublish. Deferred fields are not loaded for it.
+        self._was_published = self._loaded_is_published()
+
+    def _loaded_is_published(self):
+        published = self.__dict__.get('published')
+        date_available = self.__dict__.get('date_available')
+        return bool(published and date_available and
+                    date_available <= timezone.now())
+
     def is_published(self):
         return self.published and self.date_available <= timezone.now()
 
@@ -48,6 +64,19 @@ class Slugged(models.Model):
         max_length=150,
     )
 
+    # fields get_absolute_url is built from, their loaded values are kept
+    # so save() sees a URL change without fetching the old object
+    url_fields = ('slug',)
+
+    def __init__(self, *args, **kwargs):
+        super(Slugged, self).__init__(*args, **kwargs)
+        self._loaded_url_fields = self._url_field_values()
+
+    def _url_field_values(self):
+        # deferred fields are left out, reading them would query
+        return dict((field, self.__dict__[field])
+                    for field in self.url_fields if field in self.__dict__)
+
     def clean(self):
         if hasattr(self, 'get_absolute_url'):
             try:
@@ -70,26 +99,108 @@ class Slugged(models.Model):
         except AttributeError:
             pass  # does not implement the clean method
 
+    def loaded_absolute_url(self):
+        """
+        get_absolute_url() as it was when loaded from the database
+        """
+        loaded = self._loaded_url_fields
+        if self._state.adding or len(loaded) != len(self.url_fields):
+            # not loaded from the database or deferred fields, fetch it
+            try:
+                return self.__class__.objects.get(
+                    pk=self.pk).get_absolute_url()
+            except self.__class__.DoesNotExist:
+                return None
+
+        current = self._url_field_values()
+        self.__dict__.update(loaded)
+        try:
+            return self.get_absolute_url()
+        finally:
+            self.__dict__.update(current)
+
     def save(self, *args, **kwargs):
-        if hasattr(self, 'get_absolute_url'):
-            model = self.__class__
-            if self.pk is not None:
-                old_object = model.objects.get(pk=self.pk)
-                if old_object.slug != self.slug:
-                    redirect = Redirect(
-                        site=self.site,
-                        old_path=old_object.get_absolute_url(),
-                        new_path=self.get_absolute_url()
-                    )
-                    redirect.save()
+        if hasattr(self, 'get_absolute_url') and self.pk is not None:
+            if self._url_field_values() != self._loaded_url_fields:
+                bulk_redirect(self.site, [(self.loaded_absolute_url(),
+                                           self.get_absolute_url())])
 
         super(Slugged, self).save(*args, **kwargs)
+        self._loaded_url_fields = self._url_field_values()
 
     class Meta:
         unique_together = ['site', 'slug']
         abstract = True
 
 
+def bulk_redirect(site, paths, using=None, batch_size=500):
+    """
+    Creates a Redirect for every ``(old_path, new_path)`` of ``paths`` on
+    ``site`` with batched INSERTs, instead of one save() each. Redirects
+    of the same old paths are replaced and redirects leading to an old
+    path now lead to its new path, so no chain of redirects is left.
+    Returns the number of redirects created.
+    """
+    paths = dict((old, new) for old, new in paths if old and old != new)
+    if not paths:
+        return 0
+
+    redirects = Redirect.objects.db_manager(using).filter(site=site)
+    old_paths = list(paths)
+    for i in range(0, len(old_paths), batch_size):
+        chunk = old_paths[i:i + batch_size]
+        redirects.filter(old_path__in=chunk).delete()
+        for old_path, new_path in redirects.filter(
+                new_path__in=chunk).values_list('old_path', 'new_path'):
+            paths.setdefault(old_path, paths[new_path])
+        redirects.filter(new_path__in=chunk).delete()
+
+    created = [Redirect(site=site, old_path=old, new_path=new)
+               for old, new in paths.items() if old != new]
+    Redirect.objects.db_manager(using).bulk_create(created,
+                                                   batch_size=batch_size)
+    return len(created)
+
+
+def bulk_publish(queryset, publish=True, schedule=False, batch_size=500):
+    """
+    Publishes (or unpublishes) the rows of ``queryset`` with a few UPDATEs
+    per ``batch_size`` rows instead of a save() each, so no per row
+    signal runs: ``bulk_published`` is sent once with the ids changed.
+
+    Published rows become available now, unless ``schedule`` keeps their
+    ``date_available``. ``date_update`` is set, ``update_index --age``
+    picks the rows up. Returns the number of rows changed.
+    """
+    model = queryset.model
+    now = timezone.now()
+    if not publish:
+        changed = queryset.filter(published=True)
+    elif schedule:
+        changed = queryset.filter(published=False)
+    else:
+        changed = queryset.exclude(published=True, date_available__lte=now)
+    pks = list(changed.values_list('pk', flat=True))
+
+    has_live = 'live' in model._meta.get_all_field_names()
+    values = {'published': publish, 'date_update': now}
+    if has_live and not (publish and schedule):
+        values['live'] = publish
+    for i in range(0, len(pks), batch_size):
+        rows = model._default_manager.filter(pk__in=pks[i:i + batch_size])
+        if publish and not schedule:
+            rows.filter(models.Q(date_available__isnull=True) |
+                        models.Q(date_available__gt=now)).update(
+                date_available=now)
+        rows.update(**values)
+        if has_live and publish and schedule:
+            rows.filter(date_available__lte=now).update(live=True)
+
+    if pks:
+        bulk_published.send(sender=model, pks=pks, published=publish)
+    return len(pks)
+
+
 class BaseBox(Publishable):
     name = models.CharField(_(u"Box name"), max_length=140)
     slug = models.SlugField(
@@ -287,3 +398,20 @@ class BaseConfig(Publishable):
                                                    instance.format)
 
         return value
+
+
+def connect_box_signals(sender, **kwargs):
+    # BaseBox is abstract, boxes of every app get their handlers here
+    if issubclass(sender, BaseBox) and not sender._meta.abstract:
+        models.signals.post_save.connect(invalidate_box_cache, sender=sender)
+        models.signals.post_delete.connect(invalidate_box_cache,
+                                           sender=sender)
+        bulk_published.connect(for_each_published(invalidate_box_cache),
+                               sender=sender, weak=False)
+
+
+models.signals.class_prepared.connect(connect_box_signals)
+models.signals.post_save.connect(clear_site_cache, sender=Site)
+models.signals.post_delete.connect(clear_site_cache, sender=Site)
+request_finished.connect(deactivate)
+request_finished.connect(run_pending)
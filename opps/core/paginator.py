@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator, Page, EmptyPage
+from django.core.paginator import PageNotAnInteger
+from django.db.models import Q, Count
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import ugettext as _
+
+from opps.core.cache import make_key
+
+
+def encode_cursor(obj):
+    """
+    Opaque token pointing right after ``obj`` in (date_available, id) order
+    """
+    raw = u'{}|{}'.format(obj.date_available.isoformat(), obj.pk)
+    return urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Returns (date_available, pk) of ``cursor``, raises ValueError when the
+    token is not a valid cursor
+    """
+    try:
+        raw = urlsafe_b64decode(str(cursor)).decode('utf-8')
+        date, pk = raw.rsplit(u'|', 1)
+        date = parse_datetime(date)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError(u"Invalid cursor")
+    if date is None:
+        raise ValueError(u"Invalid cursor")
+    return date, pk
+
+
+class KeysetPage(object):
+
+    def __init__(self, object_list, cursor, paginator):
+        self.paginator = paginator
+        self.cursor = cursor
+        self.object_list = object_list[:paginator.per_page]
+        self.next_cursor = None
+        if len(object_list) > paginator.per_page:
+            self.next_cursor = encode_cursor(self.object_list[-1])
+
+    def __repr__(self):
+        return '<Page after {}>'.format(self.cursor or 'start')
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator(object):
+    """
+    Seek (keyset) pagination on (date_available, id), newest first. Pages
+    are addressed by cursors instead of numbers, so no OFFSET and no
+    COUNT(*): the last page costs the same as the first one.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+
+    def get_queryset(self, cursor=None):
+        """
+        Rows of the page after ``cursor``, plus one to detect a next page
+        """
+        queryset = self.queryset.order_by('-date_available', '-pk')
+        if cursor:
+            date, pk = decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(date_available__lt=date) |
+                Q(date_available=date, pk__lt=pk))
+        return queryset[:self.per_page + 1]
+
+    def page(self, cursor=None, object_list=None):
+        """
+        Page after ``cursor``, ``object_list`` may be given when the rows of
+        ``get_queryset`` are already evaluated (e.g. from the cache)
+        """
+        if object_list is None:
+            object_list = list(self.get_queryset(cursor))
+        return KeysetPage(list(object_list), cursor or None, self)
+
+
+class LoaderPaginator(Paginator):
+    """
+    Django's Paginator (COUNT(*) for the page numbers) evaluating the
+    sliced queryset of a page with ``loader(rows, number)``, e.g. through
+    the result cache; ``list`` by default.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, loader=None):
+        super(LoaderPaginator, self).__init__(object_list, per_page, orphans,
+                                              allow_empty_first_page)
+        self.loader = loader or (lambda rows, number: list(rows))
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        return Page(self.loader(self.object_list[bottom:top], number),
+                    number, self)
+
+
+class NoCountPaginator(Paginator):
+    """
+    Numbered pages without COUNT(*): one extra row is fetched to know if
+    there is a next page, so ``count`` and ``num_pages`` only reach the
+    current page (plus one page when there is a next one).
+
+    ``loader(rows, number)`` evaluates the sliced queryset of a page,
+    e.g. through the result cache; ``list`` by default.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, loader=None):
+        super(NoCountPaginator, self).__init__(object_list, per_page, orphans,
+                                               allow_empty_first_page)
+        self.loader = loader or (lambda rows, number: list(rows))
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = self.loader(
+            self.object_list[bottom:bottom + self.per_page + 1], number)
+        if not rows and number > 1:
+            raise EmptyPage(_('That page contains no results'))
+
+        has_next = len(rows) > self.per_page
+        self._count = bottom + len(rows)
+        self._num_pages = number + 1 if has_next else number
+        return Page(rows[:self.per_page], number, self)
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Numbered pages trusting a ``count`` computed elsewhere (see
+    ``approximate_count``) instead of running COUNT(*)
+    """
+
+    def __init__(self, object_list, per_page, count, orphans=0,
+                 allow_empty_first_page=True, loader=None):
+        super(ApproximateCountPaginator, self).__init__(
+            object_list, per_page, orphans, allow_empty_first_page)
+        self._count = count
+        self.loader = loader or (lambda rows, number: list(rows))
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = self.loader(
+            self.object_list[bottom:bottom + self.per_page], number)
+        return Page(rows, number, self)
+
+
+def _count_key(model, site, channel_long_slug):
+    # not versioned: counts are kept up to date by incr/decr, not purged
+    return make_key(u'{}:count:{}'.format(settings.OPPS_CACHE_PREFIX,
+                                          model._meta.db_table),
+                    site, channel_long_slug)
+
+
+def approximate_count(queryset, site, channel_long_slugs):
+    """
+    Number of rows of ``queryset`` (already filtered by site, channels and
+    publication) from the per channel counters in the cache. Missing
+    counters are computed with a single grouped query.
+    """
+    model = queryset.model
+    keys = dict((_count_key(model, site, long_slug), long_slug)
+                for long_slug in channel_long_slugs)
+    found = cache.get_many(keys.keys())
+    total = sum(found.values())
+
+    missing = [long_slug for key, long_slug in keys.items()
+               if key not in found]
+    if missing:
+        rows = queryset.filter(channel_long_slug__in=missing).values(
+            'channel_long_slug').annotate(total=Count('pk')).order_by()
+        counts = dict((row['channel_long_slug'], row['total'])
+                      for row in rows)
+        for long_slug in missing:
+            count = counts.get(long_slug, 0)
+            cache.set(_count_key(model, site, long_slug), count,
+                      settings.OPPS_PAGINATE_COUNT_EXPIRE)
+            total += count
+    return total
+
+
+def update_count(model, site, channel_long_slug, delta):
+    """
+    Adds ``delta`` to the counter of ``channel_long_slug``, counters not
+    in the cache are left to be computed on the next ``approximate_count``
+    """
+    key = _count_key(model, site, channel_long_slug)
+    try:
+        if delta > 0:
+            cache.incr(key, delta)
+        elif delta < 0:
+            cache.decr(key, -delta)
+    except ValueError:
+        pass
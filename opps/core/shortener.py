@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import string
+from urlparse import urlparse
+
+from django.conf import settings
+
+from opps.core.utils import class_load
+
+
+BASE62 = string.digits + string.ascii_letters
+
+
+def base62_encode(number):
+    if number < 0:
+        raise ValueError(u"Negative number: {}".format(number))
+    digits = []
+    while True:
+        number, digit = divmod(number, 62)
+        digits.append(BASE62[digit])
+        if not number:
+            break
+    return u''.join(reversed(digits))
+
+
+def base62_decode(code):
+    if not code:
+        raise ValueError(u"Empty code")
+    number = 0
+    for char in code:
+        index = BASE62.find(char)
+        if index < 0:
+            raise ValueError(u"Invalid code: {}".format(code))
+        number = number * 62 + index
+    return number
+
+
+class BaseShortener(object):
+    """
+    Short URL backend, ``OPPS_SHORT_URL_BACKEND`` names the one in use.
+    Backends talking to a remote service set ``remote`` so they run on
+    the background queue (opps.core.tasks), never while saving.
+    """
+    remote = False
+
+    def short(self, url, pk):
+        """
+        short URL of ``url``, the address of the object ``pk``
+        """
+        raise NotImplementedError
+
+
+class LocalShortener(BaseShortener):
+    """
+    Deterministic, no network: base62 of the primary key on the same
+    domain, redirected by the ``short`` URL of opps.articles
+    """
+
+    def short(self, url, pk):
+        return u'http://{}/s/{}'.format(urlparse(url).netloc,
+                                        base62_encode(pk))
+
+
+class GooglShortener(BaseShortener):
+    """
+    goo.gl through ``OPPS_SHORT_URL`` (googl.short.GooglUrlShort)
+    """
+    remote = True
+
+    def short(self, url, pk):
+        return class_load(settings.OPPS_SHORT_URL)(url).short()
+
+
+def get_shortener():
+    return class_load(settings.OPPS_SHORT_URL_BACKEND)()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from django.dispatch import Signal
+
+from opps.core.cache import invalidate_box
+
+
+# sent once by bulk_publish (no post_save per row) with the ``pks`` whose
+# state changed to ``published``
+bulk_published = Signal(providing_args=['pks', 'published'])
+
+
+def invalidate_box_cache(sender, instance, **kwargs):
+    """
+    drops the fragments rendered by the box template tags (see box_tags)
+    """
+    invalidate_box(instance.site, instance.slug, instance.channel_long_slug)
+
+
+def for_each_published(handler):
+    """
+    bulk_published receiver calling the post_save ``handler`` for every
+    row, for models published a few rows at a time (boxes, channels).
+    Connect it with ``weak=False``.
+    """
+    def receiver(sender, pks, **kwargs):
+        for instance in sender.objects.filter(
+                pk__in=pks).select_related('site'):
+            handler(sender, instance)
+    return receiver
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Current site from the request host, resolved once per request
+(``request.site``) and once per process for every host.
+
+The site and device of the request being served are kept per thread
+(``activate``), never in the global settings, so threaded workers don't
+see each other's requests.
+"""
+import threading
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+
+from opps.core.cache import bump_generation, get_generations
+
+
+# site and device of the request served by the current thread
+_active = threading.local()
+
+# generation namespace of the host map, bumped when a Site is saved or
+# deleted so every process drops its map
+SITES_NAMESPACE = u':sites'
+
+# {host: Site} of the generation _hosts_version
+_hosts = {}
+_hosts_version = None
+# Host headers come from the client, the map never grows past this
+MAX_HOSTS = 1000
+
+# without it in MIDDLEWARE_CLASSES every request is on the SITE_ID site
+DYNAMIC_SITE_MIDDLEWARE = 'opps.core.middleware.DynamicSiteMiddleware'
+
+
+def split_host(host):
+    """
+    Returns ``(domain, port)`` for ``host`` of the form ``'domain:port'``.
+
+    If host does not have a port number, ``port`` will be None.
+    """
+    if ':' in host:
+        return host.rsplit(':', 1)
+    return host, None
+
+
+def get_site_by_host(host):
+    """
+    Site of the domain of ``host``, local hosts (``OPPS_DEFAULT_URLS``) are
+    example.com and unknown domains the SITE_ID site
+    """
+    global _hosts_version
+    version = tuple(get_generations(u'', SITES_NAMESPACE))
+    if version != _hosts_version:
+        _hosts.clear()
+        _hosts_version = version
+
+    host = host.lower()
+    try:
+        return _hosts[host]
+    except KeyError:
+        pass
+
+    domain, port = split_host(host)
+    if domain in settings.OPPS_DEFAULT_URLS:
+        domain = 'example.com'
+    try:
+        site = Site.objects.get(domain=domain)
+    except Site.DoesNotExist:
+        site = Site.objects.get_current()
+
+    if len(_hosts) >= MAX_HOSTS:
+        _hosts.clear()
+    _hosts[host] = site
+    return site
+
+
+def activate(site=None, is_mobile=None):
+    """
+    sets the site and/or device of the current thread, see
+    DynamicSiteMiddleware and MobileDetectionMiddleware
+    """
+    if site is not None:
+        _active.site = site
+    if is_mobile is not None:
+        _active.is_mobile = is_mobile
+
+
+def deactivate(**kwargs):
+    # request_finished receiver, the thread serves other requests next
+    _active.__dict__.clear()
+
+
+def get_active_site():
+    return getattr(_active, 'site', None)
+
+
+def active_is_mobile():
+    return getattr(_active, 'is_mobile', False)
+
+
+def get_request_site(request=None):
+    """
+    ``request.site``, resolved on first use: from the host with
+    DynamicSiteMiddleware installed, the SITE_ID site otherwise. Without
+    a request (template tags rendered outside a view) the site of the
+    current thread, or the SITE_ID site.
+    """
+    if request is None:
+        return get_active_site() or Site.objects.get_current()
+    site = getattr(request, 'site', None)
+    if site is None:
+        if DYNAMIC_SITE_MIDDLEWARE in settings.MIDDLEWARE_CLASSES:
+            site = get_site_by_host(request.get_host())
+        else:
+            site = Site.objects.get_current()
+        request.site = site
+    return site
+
+
+def clear_site_cache(sender, **kwargs):
+    _hosts.clear()
+    bump_generation(u'', SITES_NAMESPACE)
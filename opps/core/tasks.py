@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import Queue
+
+from django.conf import settings
+from django.db import close_connection, transaction
+
+
+logger = logging.getLogger(__name__)
+
+_queue = Queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+# jobs of the current thread waiting for its transaction to commit
+_pending = threading.local()
+
+
+def _work():
+    while True:
+        func, args, kwargs = _queue.get()
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            logger.exception(u"Background task %r failed", func)
+        finally:
+            close_connection()
+            _queue.task_done()
+
+
+def enqueue(func, *args, **kwargs):
+    """
+    Runs ``func(*args, **kwargs)`` on a background thread of this process,
+    off the request and save paths. Jobs still queued when the process
+    exits are lost, use it for work that is redone when missing (e.g.
+    short URLs, generated again on the next save).
+    ``OPPS_TASKS_EAGER = True`` runs jobs right away (tests, scripts).
+    """
+    global _worker
+    if settings.OPPS_TASKS_EAGER:
+        return func(*args, **kwargs)
+
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name='opps-tasks')
+            _worker.daemon = True
+            _worker.start()
+    _queue.put((func, args, kwargs))
+
+
+def enqueue_on_commit(func, *args, **kwargs):
+    """
+    ``enqueue`` once the rows the job reads are committed. Django 1.5 has
+    no commit hook: outside a managed transaction the job is queued right
+    away, inside one (commit_on_success of the admin, TransactionMiddleware)
+    it waits for the end of the request, see ``run_pending``.
+    """
+    if settings.OPPS_TASKS_EAGER or not transaction.is_managed():
+        return enqueue(func, *args, **kwargs)
+    if not hasattr(_pending, 'jobs'):
+        _pending.jobs = []
+    _pending.jobs.append((func, args, kwargs))
+
+
+def run_pending(**kwargs):
+    """
+    Queues the jobs of ``enqueue_on_commit`` held by this thread, connected
+    to request_finished. Scripts saving inside their own transaction call
+    it once committed.
+    """
+    jobs, _pending.jobs = getattr(_pending, 'jobs', []), []
+    for func, args, kwargs in jobs:
+        enqueue(func, *args, **kwargs)
+
+
+def join():
+    """
+    Blocks until every queued job ran
+    """
+    _queue.join()
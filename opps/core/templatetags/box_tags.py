@@ -1,56 +1,85 @@
 # -*- coding: utf-8 -*-
 from django import template
-from django.conf import settings
 from django.utils import timezone
 
-from opps.core.utils import get_app_model
+from opps.core.cache import _cache_key, box_namespace, cache_fetch
+from opps.core.cache import next_transition, transition_timeout
+from opps.core.sites import get_request_site
+from opps.core.utils import get_app_model, is_mobile
 
 
 register = template.Library()
 
 
-@register.simple_tag
-def get_box(appname, slug, template_name=None):
+@register.simple_tag(takes_context=True)
+def get_box(context, appname, slug, template_name=None):
     """
     {% load box_tags %}
     {% get_box 'polls' 'box_slug' %}
     """
     model = get_app_model(appname, "Box")
-    try:
-        box = model.objects.get(site=settings.SITE_ID, slug=slug,
-                                date_available__lte=timezone.now(),
-                                published=True)
-    except model.DoesNotExist:
-        box = None
-
-    if template_name:
-        t = template.loader.get_template(template_name)
-    else:
-        t = template.loader.get_template(
-            '{0}/{1}_detail.html'.format(appname, model.__name__.lower())
-        )
-    return t.render(template.Context({'{0}'.format(
-        model.__name__.lower()): box, 'slug': slug}))
-
-
-@register.simple_tag
-def get_all_box(appname, channel_long_slug, template_name=None):
+    site = get_request_site(context.get('request'))
+
+    def render():
+        try:
+            box = model.objects.get(site=site, slug=slug,
+                                    date_available__lte=timezone.now(),
+                                    published=True)
+        except model.DoesNotExist:
+            box = None
+
+        if template_name:
+            t = template.loader.get_template(template_name)
+        else:
+            t = template.loader.get_template(
+                '{0}/{1}_detail.html'.format(appname, model.__name__.lower())
+            )
+        return t.render(template.Context({'{0}'.format(
+            model.__name__.lower()): box, 'slug': slug}))
+
+    def timeout():
+        # a scheduled box shows up on its date_available
+        return transition_timeout([next_transition(model.objects.filter(
+            site=site, slug=slug, published=True),
+            'date_available')])
+
+    cachekey = _cache_key('fragment', model, site,
+                          box_namespace(slug), template_name or '',
+                          mobile=is_mobile(context.get('request')))
+    return cache_fetch(cachekey, render, timeout)
+
+
+@register.simple_tag(takes_context=True)
+def get_all_box(context, appname, channel_long_slug, template_name=None):
     """
     {% load box_tags %}
     {% get_all_box 'polls' 'channel_slug' %}
     """
     model = get_app_model(appname, "Box")
-    boxes = model.objects.filter(site=settings.SITE_ID,
-                                 date_available__lte=timezone.now(),
-                                 published=True,
-                                 channel_long_slug=channel_long_slug)
-
-    if template_name:
-        t = template.loader.get_template(template_name)
-    else:
-        t = template.loader.get_template(
-            '{0}/{1}_list.html'.format(appname, model.__name__.lower())
-        )
-
-    return t.render(template.Context({'{0}boxes'.format(
-        model.__name__.lower()): boxes}))
+    site = get_request_site(context.get('request'))
+
+    def render():
+        boxes = model.objects.filter(site=site,
+                                     date_available__lte=timezone.now(),
+                                     published=True,
+                                     channel_long_slug=channel_long_slug)
+
+        if template_name:
+            t = template.loader.get_template(template_name)
+        else:
+            t = template.loader.get_template(
+                '{0}/{1}_list.html'.format(appname, model.__name__.lower())
+            )
+
+        return t.render(template.Context({'{0}boxes'.format(
+            model.__name__.lower()): boxes}))
+
+    def timeout():
+        return transition_timeout([next_transition(model.objects.filter(
+            site=site, published=True,
+            channel_long_slug=channel_long_slug), 'date_available')])
+
+    cachekey = _cache_key('fragments', model, site,
+                          channel_long_slug, template_name or '',
+                          mobile=is_mobile(context.get('request')))
+    return cache_fetch(cachekey, render, timeout)
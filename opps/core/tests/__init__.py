@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+from opps.core.tests.cache import *
+from opps.core.tests.paginator import *
+from opps.core.tests.shortener import *
+from opps.core.tests.sites import *
+from opps.core.tests.mobile import *
+from opps.core.tests.loaders import *
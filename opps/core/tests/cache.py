@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.sites.models import Site
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.utils import timezone
+from mock import patch
+
+from opps.articles.models import Post
+from opps.articles.signals import invalidate_channel_cache
+from opps.channels.models import Channel
+from opps.core.cache import cache_fetch, make_key, transition_timeout
+from opps.core.cache import _cache_key, bump_generation, get_generations
+from opps.core.cache import cache_objects
+from opps.core.decorators import cache_page
+
+
+class CacheFetchTest(TestCase):
+
+    def setUp(self):
+        self.cache = LocMemCache('opps-core-tests', {})
+        self.cache.clear()
+        patcher = patch('opps.core.cache.cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.calls = []
+        self.calls_lock = threading.Lock()
+
+    def compute(self, value='fresh', duration=0.2):
+        def callback():
+            with self.calls_lock:
+                self.calls.append(value)
+            time.sleep(duration)
+            return value
+        return callback
+
+    def test_concurrent_misses_compute_once(self):
+        results = []
+
+        def worker():
+            results.append(cache_fetch('key', self.compute(), timeout=60))
+
+        threads = [threading.Thread(target=worker) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(results, ['fresh'] * 20)
+
+    def test_hit_does_not_compute(self):
+        cache_fetch('key', self.compute(duration=0), timeout=60)
+        self.assertEqual(cache_fetch('key', self.compute('other'), 60),
+                         'fresh')
+        self.assertEqual(self.calls, ['fresh'])
+
+    def test_serve_stale_while_revalidating(self):
+        self.cache.set('key', ('stale', time.time() - 1, 0), 60)
+        self.cache.add('key:lock', 1, 10)  # another worker is refreshing
+
+        self.assertEqual(cache_fetch('key', self.compute(), 60), 'stale')
+        self.assertEqual(self.calls, [])
+
+    def test_expired_entry_is_refreshed(self):
+        self.cache.set('key', ('stale', time.time() - 1, 0), 60)
+
+        self.assertEqual(cache_fetch('key', self.compute(duration=0), 60),
+                         'fresh')
+        self.assertEqual(cache_fetch('key', self.compute('other'), 60),
+                         'fresh')
+
+    def test_early_refresh_depends_on_recompute_time(self):
+        # expires in 1 second but takes 1 hour to compute: always refreshed
+        self.cache.set('key', ('old', time.time() + 1, 3600), 60)
+        self.assertEqual(cache_fetch('key', self.compute(duration=0), 60),
+                         'fresh')
+
+        # cheap to compute and far from expiry: never refreshed early
+        self.cache.set('key', ('old', time.time() + 3600, 0.01), 60)
+        self.assertEqual(cache_fetch('key', self.compute(duration=0), 60),
+                         'old')
+
+    def test_timeout_callable_after_compute(self):
+        timeouts = []
+
+        def timeout():
+            timeouts.append(list(self.calls))
+            return 60
+
+        cache_fetch('key', self.compute(duration=0), timeout)
+        self.assertEqual(timeouts, [['fresh']])
+        self.assertTrue(self.cache.get('key')[1] <= time.time() + 60)
+
+
+class TransitionTimeoutTest(TestCase):
+
+    def test_capped_to_next_transition(self):
+        soon = timezone.now() + timedelta(seconds=30)
+        self.assertTrue(25 <= transition_timeout([soon], 300) <= 30)
+
+    def test_past_and_missing_transitions_ignored(self):
+        past = timezone.now() - timedelta(seconds=30)
+        later = timezone.now() + timedelta(hours=1)
+        self.assertEqual(transition_timeout([None, past, later], 300), 300)
+        self.assertEqual(transition_timeout([], 300), 300)
+
+
+class MakeKeyTest(TestCase):
+
+    def test_fixed_length(self):
+        short = make_key('opps:list:articles_post', 'example.com', 'news')
+        long = make_key('opps:list:articles_post', 'example.com',
+                        'channel/' * 100)
+        self.assertEqual(len(short), len(long))
+        self.assertTrue(len(make_key('x' * 300, 'a')) < 250)
+
+    def test_readable_prefix(self):
+        self.assertTrue(make_key('opps:list articles_post', 'a')
+                        .startswith('opps:listarticles_post:'))
+
+    def test_components_do_not_collide(self):
+        self.assertNotEqual(make_key('opps', 'a:b', 'c'),
+                            make_key('opps', 'a', 'b:c'))
+        self.assertNotEqual(make_key('opps', 'a', 'b'),
+                            make_key('opps', 'b', 'a'))
+
+
+class CacheObjectsTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def setUp(self):
+        self.cache = LocMemCache('opps-core-tests', {})
+        self.cache.clear()
+        patcher = patch('opps.core.cache.cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_inherited_model_round_trip(self):
+        cache_objects('posts', Post.objects.filter(pk=1))
+        with self.assertNumQueries(0):
+            post, = cache_objects('posts', Post.objects.filter(pk=1))
+
+        self.assertEqual(post.pk, 1)
+        self.assertEqual(post.article_ptr_id, 1)
+        self.assertEqual(post.id, 1)
+        self.assertEqual(post._state.db, 'default')
+        self.assertFalse(post._state.adding)
+        self.assertEqual(post.content, Post.objects.get(pk=1).content)
+
+    def test_fields_left_out_are_deferred(self):
+        stored = Post.objects.get(pk=1)
+        cache_objects('titles', Post.objects.filter(pk=1), fields=('title',))
+        with self.assertNumQueries(0):
+            post, = cache_objects('titles', Post.objects.filter(pk=1),
+                                  fields=('title',))
+            self.assertEqual(post.pk, 1)
+            self.assertEqual(post.title, stored.title)
+        # loaded on access, like QuerySet.only
+        with self.assertNumQueries(1):
+            self.assertEqual(post.content, stored.content)
+
+    def test_empty_result(self):
+        self.assertEqual(cache_objects('none', Post.objects.filter(pk=0)),
+                         [])
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                cache_objects('none', Post.objects.filter(pk=0)), [])
+
+
+class GenerationTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def setUp(self):
+        self.cache = LocMemCache('opps-core-tests', {})
+        self.cache.clear()
+        patcher = patch('opps.core.cache.cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.site = Site.objects.get(pk=1)
+
+    def key(self, long_slug, *dimensions):
+        return _cache_key('list', Channel, self.site, long_slug,
+                          *dimensions)
+
+    def test_stable_until_bumped(self):
+        self.assertEqual(get_generations(self.site, u'channel-01'),
+                         get_generations(self.site, u'channel-01'))
+        self.assertEqual(self.key(u'channel-01', 1),
+                         self.key(u'channel-01', 1))
+
+    def test_bump_invalidates_every_key_of_the_channel(self):
+        before = [self.key(u'channel-01', page) for page in (1, 2, 3)]
+        bump_generation(self.site, u'channel-01')
+        after = [self.key(u'channel-01', page) for page in (1, 2, 3)]
+        self.assertFalse(set(before) & set(after))
+
+    def test_site_bump_invalidates_every_channel(self):
+        before = [self.key(u'channel-01'), self.key(u'channel-02')]
+        bump_generation(self.site)
+        self.assertNotEqual(self.key(u'channel-01'), before[0])
+        self.assertNotEqual(self.key(u'channel-02'), before[1])
+
+    def test_channel_and_ancestors_not_siblings(self):
+        long_slugs = (u'channel-01/sub-channel-01', u'channel-01',
+                      u'channel-02', u'home')
+        before = dict((long_slug, self.key(long_slug))
+                      for long_slug in long_slugs)
+        invalidate_channel_cache(
+            Channel, Channel.objects.get(long_slug=long_slugs[0]))
+
+        self.assertNotEqual(self.key(long_slugs[0]), before[long_slugs[0]])
+        self.assertNotEqual(self.key(long_slugs[1]), before[long_slugs[1]])
+        self.assertEqual(self.key(long_slugs[2]), before[long_slugs[2]])
+        self.assertEqual(self.key(long_slugs[3]), before[long_slugs[3]])
+
+    def test_long_keys_hashed(self):
+        long_slug = u'/'.join([u'channel'] * 100)
+        key = self.key(long_slug, u'x' * 300)
+        self.assertEqual(len(key), len(self.key(u'news')))
+        self.assertEqual(key, self.key(long_slug, u'x' * 300))
+        self.assertTrue(len(key) < 250)
+
+
+@override_settings(OPPS_PAGE_CACHE_EXPIRE={'feed': 60, 'off': 0})
+class CachePageTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def setUp(self):
+        self.cache = LocMemCache('opps-core-tests', {})
+        self.cache.clear()
+        for target in ('opps.core.cache.cache', 'opps.core.decorators.cache'):
+            patcher = patch(target, self.cache)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.calls = []
+
+        def view(request):
+            self.calls.append(request.get_full_path())
+            return HttpResponse(u'page {}'.format(len(self.calls)))
+        self.view = view
+
+    def get(self, view, path='/feed', is_mobile=False, **extra):
+        request = RequestFactory().get(path, **extra)
+        request.is_mobile = is_mobile
+        return view(request).content
+
+    def test_varies_on_device_and_pagination_only(self):
+        view = cache_page('feed')(self.view)
+        self.assertEqual(self.get(view), 'page 1')
+        self.assertEqual(self.get(view, HTTP_USER_AGENT='Firefox/22'),
+                         'page 1')
+        self.assertEqual(self.get(view, '/feed?utm_source=x'), 'page 1')
+        self.assertEqual(self.get(view, is_mobile=True), 'page 2')
+        self.assertEqual(self.get(view, '/feed?page=2'), 'page 3')
+        self.assertEqual(len(self.calls), 3)
+
+    def test_route_turned_off(self):
+        view = cache_page('off')(self.view)
+        self.get(view)
+        self.get(view)
+        self.assertEqual(len(self.calls), 2)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+
+from django.contrib.sites.models import Site
+from django.template import Context, TemplateDoesNotExist
+from django.test import TestCase
+from django.test.utils import override_settings
+from mock import patch
+
+from opps.core.loaders import CachedLoader
+from opps.core.loaders import resolve_template, resolved_templates
+from opps.core.loaders import compiled_templates
+from opps.core.sites import activate, deactivate
+
+
+class ResolveTemplateTest(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        os.mkdir(os.path.join(self.root, 'articles'))
+        self.write('articles/post_detail.html')
+        resolved_templates.clear()
+        compiled_templates.clear()
+
+        settings = override_settings(TEMPLATE_DIRS=(self.root,),
+                                     TEMPLATE_DIRS_WEB=(self.root,),
+                                     DEBUG=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def write(self, name, source='{{ context }}'):
+        with open(os.path.join(self.root, name), 'w') as f:
+            f.write(source)
+
+    def test_first_existing_name(self):
+        names = ['articles/channel-01/post.html', 'articles/post_detail.html']
+        self.assertEqual(resolve_template(names).name, names[1])
+        self.assertEqual(resolve_template(['articles/missing.html']), None)
+
+    def test_loaders_searched_once(self):
+        names = ['articles/missing.html', 'articles/post_detail.html']
+        template = resolve_template(names)
+        resolve_template(['articles/missing.html'])
+        with patch('opps.core.loaders.get_template') as get_template:
+            self.assertIs(resolve_template(names), template)
+            self.assertEqual(resolve_template(['articles/missing.html']),
+                             None)
+        self.assertFalse(get_template.called)
+
+    def test_compiled_once_per_name(self):
+        # OppsDetail lists the article slug first, each article its own list
+        templates = set(
+            resolve_template(['articles/post-{}.html'.format(i),
+                              'articles/post_detail.html'])
+            for i in range(20))
+        self.assertEqual(len(templates), 1)
+        self.assertEqual(len(resolved_templates), 20)
+        self.assertEqual(len(compiled_templates), 1)
+
+    def test_debug_sees_new_templates(self):
+        names = ['articles/new.html', 'articles/post_detail.html']
+        with override_settings(DEBUG=True):
+            self.assertEqual(resolve_template(names).name, names[1])
+            self.write('articles/new.html')
+            self.assertEqual(resolve_template(names).name, names[0])
+
+            self.write('articles/new.html', u'edited')
+            # mtimes may have a one second resolution
+            os.utime(os.path.join(self.root, 'articles/new.html'), (1, 1))
+            self.assertEqual(resolve_template(names).render(Context()),
+                             u'edited')
+
+
+class CachedLoaderTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for folder, source in (('web', u'web'), ('mobile', u'mobile'),
+                               ('site', u'site')):
+            os.mkdir(os.path.join(self.root, folder))
+            with open(os.path.join(self.root, folder, 'page.html'),
+                      'w') as f:
+                f.write(source)
+
+        self.site = Site.objects.create(domain=u'other.com', name=u'other')
+        settings = override_settings(
+            TEMPLATE_DIRS_WEB=(os.path.join(self.root, 'web'),),
+            TEMPLATE_DIRS_MOBILE=(os.path.join(self.root, 'mobile'),),
+            OPPS_SITE_TEMPLATE_DIRS={
+                u'other.com': (os.path.join(self.root, 'site'),)})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(deactivate)
+        self.loader = CachedLoader(('opps.core.loaders.Loader',))
+
+    def render(self, site=None, is_mobile=False):
+        deactivate()
+        activate(site, is_mobile)
+        template, origin = self.loader.load_template('page.html')
+        return template.render(Context())
+
+    def test_keyed_on_site_and_device(self):
+        self.assertEqual(self.render(), u'web')
+        self.assertEqual(self.render(is_mobile=True), u'mobile')
+        self.assertEqual(self.render(self.site), u'site')
+        self.assertEqual(self.render(), u'web')
+
+    def test_loaders_searched_once(self):
+        self.render(self.site)
+        with patch.object(self.loader, 'find_template') as find_template:
+            self.assertEqual(self.render(self.site), u'site')
+        self.assertFalse(find_template.called)
+
+    def test_missing_template(self):
+        self.assertRaises(TemplateDoesNotExist,
+                          self.loader.load_template, 'missing.html')
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+
+from opps.core.middleware import MobileDetectionMiddleware
+from opps.core.sites import deactivate
+from opps.core.utils import LRUCache
+
+
+IPHONE = ('Mozilla/5.0 (iPhone; CPU iPhone OS 6_1_4 like Mac OS X) '
+          'AppleWebKit/536.26 (KHTML, like Gecko) Mobile/10B350')
+IPAD = ('Mozilla/5.0 (iPad; CPU OS 6_1_3 like Mac OS X) '
+        'AppleWebKit/536.26 (KHTML, like Gecko) Mobile/10B329')
+DESKTOP = ('Mozilla/5.0 (Windows NT 6.1; WOW64; rv:22.0) Gecko/20100101 '
+           'Firefox/22.0')
+
+
+class LRUCacheTest(TestCase):
+
+    def test_least_recently_used_dropped(self):
+        cache = LRUCache(maxsize=2)
+        cache.get('a', unicode)
+        cache.get('b', unicode)
+        cache.get('a', unicode)
+        cache.get('c', unicode)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        cache.get('b', unicode)
+        self.assertEqual(cache.misses, 4)
+
+
+@override_settings(OPPS_CHECK_MOBILE=True)
+class MobileDetectionTest(TestCase):
+
+    def setUp(self):
+        self.middleware = MobileDetectionMiddleware()
+        self.addCleanup(deactivate)
+
+    def is_mobile(self, user_agent, **extra):
+        request = RequestFactory().get('/', HTTP_USER_AGENT=user_agent,
+                                       **extra)
+        self.middleware.process_request(request)
+        return request.is_mobile
+
+    def test_devices(self):
+        self.assertTrue(self.is_mobile(IPHONE))
+        self.assertTrue(self.is_mobile('Nokia6300/2.0 (05.00)'))
+        self.assertFalse(self.is_mobile(IPAD))
+        self.assertFalse(self.is_mobile(DESKTOP))
+        self.assertTrue(self.is_mobile(
+            DESKTOP, HTTP_ACCEPT='application/vnd.wap.xhtml+xml'))
+
+    def test_decisions_cached(self):
+        for i in range(3):
+            self.is_mobile(IPHONE)
+        self.assertEqual((self.middleware.decisions.hits,
+                          self.middleware.decisions.misses), (2, 1))
+
+    @override_settings(OPPS_CHECK_MOBILE=False)
+    def test_disabled(self):
+        self.assertFalse(self.is_mobile(IPHONE))
+        self.assertEqual(len(self.middleware.decisions), 0)
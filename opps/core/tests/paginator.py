@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+from django.contrib.sites.models import Site
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.paginator import EmptyPage
+from django.test import TestCase
+from django.utils import timezone
+from mock import patch
+
+from opps.articles.models import Post
+from opps.core.paginator import encode_cursor, decode_cursor
+from opps.core.paginator import NoCountPaginator, ApproximateCountPaginator
+from opps.core.paginator import KeysetPaginator
+from opps.core.paginator import approximate_count, update_count
+
+
+class Row(object):
+    def __init__(self, pk, date_available):
+        self.pk = pk
+        self.date_available = date_available
+
+
+class CursorTest(TestCase):
+
+    def test_roundtrip(self):
+        date = datetime(2013, 5, 2, 10, 30, 15, 250)
+        self.assertEqual(decode_cursor(encode_cursor(Row(42, date))),
+                         (date, 42))
+
+    def test_roundtrip_without_microseconds(self):
+        date = datetime(2013, 5, 2, 10, 30)
+        self.assertEqual(decode_cursor(encode_cursor(Row(1, date))),
+                         (date, 1))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, decode_cursor, 'not a cursor')
+        self.assertRaises(ValueError, decode_cursor, 'bm90fGE=')
+
+
+class KeysetPaginatorTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def setUp(self):
+        same = timezone.now() - timedelta(days=1)
+        for i in range(7):
+            Post.objects.create(
+                title=u'post {}'.format(i), slug=u'post-{}'.format(i),
+                content=u'content', channel_id=2, site_id=1, user_id=1,
+                published=True, date_available=same,
+                short_url=u'http://example.com/{}'.format(i))
+        self.queryset = Post.objects.filter(site=1,
+                                            channel_long_slug=u'channel-01')
+
+    def test_rows_sharing_a_date(self):
+        paginator = KeysetPaginator(self.queryset, 3)
+        seen = []
+        cursor = None
+        while True:
+            page = paginator.page(cursor)
+            seen.extend(post.pk for post in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+
+        # no row skipped nor repeated across the pages sharing the date
+        self.assertEqual(seen, list(self.queryset.order_by(
+            '-date_available', '-pk').values_list('pk', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+
+class NoCountPaginatorTest(TestCase):
+
+    def setUp(self):
+        self.paginator = NoCountPaginator(range(25), 10)
+
+    def test_has_next_without_count(self):
+        page = self.paginator.page(2)
+        self.assertEqual(list(page.object_list), list(range(10, 20)))
+        self.assertTrue(page.has_next())
+        self.assertTrue(page.has_previous())
+
+    def test_last_page(self):
+        page = self.paginator.page(3)
+        self.assertEqual(list(page.object_list), list(range(20, 25)))
+        self.assertFalse(page.has_next())
+
+    def test_empty_page(self):
+        self.assertRaises(EmptyPage, self.paginator.page, 4)
+
+    def test_loader(self):
+        calls = []
+
+        def loader(rows, number):
+            calls.append(number)
+            return list(rows)
+
+        NoCountPaginator(range(25), 10, loader=loader).page(1)
+        self.assertEqual(calls, [1])
+
+
+class ApproximateCountTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def setUp(self):
+        self.cache = LocMemCache('opps-core-tests', {})
+        self.cache.clear()
+        patcher = patch('opps.core.paginator.cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.site = Site.objects.get(pk=1)
+        self.queryset = Post.objects.filter(site=self.site, published=True)
+        self.long_slugs = [u'channel-01', u'channel-02']
+
+    def count(self):
+        return approximate_count(self.queryset, self.site, self.long_slugs)
+
+    def test_miss_counts_exactly(self):
+        exact = self.queryset.filter(
+            channel_long_slug__in=self.long_slugs).count()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.count(), exact)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.count(), exact)
+
+    def test_update_count(self):
+        total = self.count()
+        update_count(Post, self.site, u'channel-01', 3)
+        self.assertEqual(self.count(), total + 3)
+        update_count(Post, self.site, u'channel-02', -1)
+        self.assertEqual(self.count(), total + 2)
+
+    def test_update_missing_count_left_for_next_count(self):
+        update_count(Post, self.site, u'channel-01', 3)
+        exact = self.queryset.filter(
+            channel_long_slug__in=self.long_slugs).count()
+        self.assertEqual(self.count(), exact)
+
+
+class ApproximateCountPaginatorTest(TestCase):
+
+    def test_pages_from_given_count(self):
+        paginator = ApproximateCountPaginator(range(25), 10, count=25)
+        self.assertEqual(paginator.num_pages, 3)
+        self.assertEqual(list(paginator.page(3).object_list),
+                         list(range(20, 25)))
+
+    def test_beyond_count(self):
+        paginator = ApproximateCountPaginator(range(25), 10, count=15)
+        self.assertRaises(EmptyPage, paginator.page, 3)
+
+    def test_count_ahead_of_rows(self):
+        # counters not yet decremented: the last pages may come up short
+        paginator = ApproximateCountPaginator(range(15), 10, count=25)
+        self.assertEqual(list(paginator.page(3).object_list), [])
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from opps.core.shortener import base62_encode, base62_decode
+from opps.core.shortener import LocalShortener
+from opps.core.tasks import enqueue_on_commit, run_pending, join
+
+
+class Base62Test(TestCase):
+
+    def test_round_trip(self):
+        for number in (0, 1, 61, 62, 3843, 3844, 2 ** 40):
+            self.assertEqual(base62_decode(base62_encode(number)), number)
+
+    def test_short_codes(self):
+        self.assertEqual(base62_encode(0), u'0')
+        self.assertEqual(base62_encode(61), u'Z')
+        self.assertEqual(base62_encode(62), u'10')
+
+    def test_invalid_code(self):
+        self.assertRaises(ValueError, base62_decode, u'')
+        self.assertRaises(ValueError, base62_decode, u'a-b')
+
+
+class LocalShortenerTest(TestCase):
+
+    def test_same_domain(self):
+        self.assertEqual(
+            LocalShortener().short(u'http://example.com/news/title', 62),
+            u'http://example.com/s/10')
+
+
+@override_settings(OPPS_TASKS_EAGER=False)
+class EnqueueOnCommitTest(TestCase):
+
+    def test_waits_for_the_end_of_the_request(self):
+        # TestCase runs inside a managed transaction
+        done = []
+        enqueue_on_commit(done.append, 1)
+        join()
+        self.assertEqual(done, [])
+
+        run_pending()
+        join()
+        self.assertEqual(done, [1])
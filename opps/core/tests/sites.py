@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import threading
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import Site
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from django.template.response import TemplateResponse
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+from mock import patch
+
+from opps.articles.models import Article, Post
+from opps.channels.models import Channel
+from opps.core.admin import PublishableAdmin
+from opps.core.cache import bump_generation
+from opps.core.loaders import active_template_dirs
+from opps.core.middleware import DynamicSiteMiddleware
+from opps.core.middleware import MobileDetectionMiddleware
+from opps.core.middleware import TemplateContextMiddleware
+from opps.core.sites import get_site_by_host, get_request_site, _hosts
+from opps.core.sites import activate, deactivate, get_active_site
+from opps.core.sites import SITES_NAMESPACE, DYNAMIC_SITE_MIDDLEWARE
+
+
+class SiteResolutionTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def setUp(self):
+        _hosts.clear()
+        self.other = Site.objects.create(domain=u'other.com',
+                                         name=u'other.com')
+
+    def test_host_resolved_once(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_site_by_host(u'other.com:8000'), self.other)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_site_by_host(u'OTHER.com:8000'), self.other)
+
+    def test_local_and_unknown_hosts(self):
+        self.assertEqual(get_site_by_host(u'localhost:8000').pk, 1)
+        self.assertEqual(get_site_by_host(u'unknown.com').pk, 1)
+
+    def test_site_save_clears_hosts(self):
+        get_site_by_host(u'other.com')
+        self.other.domain = u'renamed.com'
+        self.other.save()
+        self.assertEqual(get_site_by_host(u'other.com').pk, 1)
+        self.assertEqual(get_site_by_host(u'renamed.com'), self.other)
+
+    def test_other_process_site_save(self):
+        cache = LocMemCache('opps-core-tests', {})
+        with patch('opps.core.cache.cache', cache):
+            get_site_by_host(u'other.com')
+            # another worker saved a Site: only the cache generation moves
+            bump_generation(u'', SITES_NAMESPACE)
+            with self.assertNumQueries(1):
+                get_site_by_host(u'other.com')
+
+    @override_settings(MIDDLEWARE_CLASSES=(DYNAMIC_SITE_MIDDLEWARE,))
+    def test_request_site_memoized(self):
+        request = RequestFactory().get('/', HTTP_HOST='other.com')
+        self.assertEqual(get_request_site(request), self.other)
+        self.assertEqual(request.site, self.other)
+        request.site = Site(pk=1)
+        self.assertEqual(get_request_site(request).pk, 1)
+
+    def test_request_site_without_middleware(self):
+        with override_settings(SITE_ID=self.other.pk):
+            request = RequestFactory().get('/', HTTP_HOST='example.com')
+            self.assertEqual(get_request_site(request), self.other)
+
+    def test_unknown_host_on_site_id(self):
+        with override_settings(SITE_ID=self.other.pk):
+            self.assertEqual(get_site_by_host(u'unknown.com'), self.other)
+
+
+@override_settings(OPPS_CHECK_MOBILE=True, TEMPLATE_DIRS=('/default',),
+                   TEMPLATE_DIRS_WEB=('/web',),
+                   TEMPLATE_DIRS_MOBILE=('/mobile',),
+                   OPPS_SITE_TEMPLATE_DIRS={u'other.com': ('/other',)},
+                   TEMPLATE_LOADERS=('opps.core.loaders.Loader',),
+                   MIDDLEWARE_CLASSES=(DYNAMIC_SITE_MIDDLEWARE,))
+class ActiveSiteTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def setUp(self):
+        _hosts.clear()
+        self.other = Site.objects.create(domain=u'other.com',
+                                         name=u'other.com')
+        self.addCleanup(deactivate)
+
+    def test_middlewares_leave_settings(self):
+        request = RequestFactory().get(
+            '/', HTTP_HOST='other.com', HTTP_USER_AGENT='Mobile Safari')
+        DynamicSiteMiddleware().process_request(request)
+        MobileDetectionMiddleware().process_request(request)
+
+        self.assertEqual(settings.SITE_ID, 1)
+        self.assertEqual(settings.TEMPLATE_DIRS, ('/default',))
+        self.assertEqual(get_active_site(), self.other)
+        self.assertEqual(get_request_site(), self.other)
+        self.assertEqual(active_template_dirs(), ['/other', '/mobile'])
+
+    def test_per_thread(self):
+        activate(site=self.other, is_mobile=True)
+        seen = []
+
+        def other_request():
+            activate(is_mobile=False)
+            seen.append((get_active_site(), active_template_dirs()))
+        thread = threading.Thread(target=other_request)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(seen, [(None, ['/web'])])
+        self.assertEqual(active_template_dirs(), ['/other', '/mobile'])
+        deactivate()
+        self.assertEqual(active_template_dirs(), ['/web'])
+
+    def test_stock_loaders_refused(self):
+        with override_settings(TEMPLATE_LOADERS=(
+                'django.template.loaders.filesystem.Loader',)):
+            self.assertRaises(ImproperlyConfigured, MobileDetectionMiddleware)
+            self.assertRaises(ImproperlyConfigured, DynamicSiteMiddleware)
+        with override_settings(TEMPLATE_LOADERS=(
+                ('opps.core.loaders.CachedLoader', (
+                    'opps.core.loaders.Loader',
+                    'django.template.loaders.app_directories.Loader')),)):
+            MobileDetectionMiddleware()
+
+    def test_on_site_manager(self):
+        Article.objects.filter(pk=1).update(site=self.other)
+        activate(site=self.other)
+        self.assertEqual(
+            list(Article.on_site.values_list('pk', flat=True)), [1])
+        deactivate()
+        self.assertNotIn(1, Article.on_site.values_list('pk', flat=True))
+
+    def test_admin_saves_on_request_site(self):
+        request = RequestFactory().get('/', HTTP_HOST='other.com')
+        request.user = get_user_model().objects.get(pk=1)
+        post = Post(title=u'other', slug=u'other', channel_id=1)
+        with patch.object(Post, 'save'):
+            PublishableAdmin(Post, admin.site).save_model(
+                request, post, None, False)
+        self.assertEqual(post.site, self.other)
+
+
+class TemplateContextTest(TestCase):
+
+    fixtures = ['tests/initial_data.json']
+
+    def process(self):
+        request = RequestFactory().get('/')
+        response = TemplateResponse(request, 'unused.html', {})
+        return TemplateContextMiddleware().process_template_response(
+            request, response).context_data['channel']
+
+    def test_homepage_channel_model(self):
+        channel = self.process()
+        home = Channel.objects.get(homepage=True)
+        self.assertEqual(channel.pk, home.pk)
+        self.assertEqual(channel.get_absolute_url(), home.get_absolute_url())
+        self.assertEqual(channel.site, home.site)
+        self.assertEqual(list(channel.get_children()),
+                         list(home.get_children()))
+
+    def test_loaded_when_used(self):
+        self.process()  # warm up site and channel tree
+        with self.assertNumQueries(0):
+            channel = self.process()
+        with self.assertNumQueries(1):
+            channel.long_slug
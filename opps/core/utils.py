@@ -1,4 +1,6 @@
 # coding: utf-8
+import threading
+from collections import OrderedDict
 
 from django.db.models import get_models, get_app
 
@@ -12,8 +14,60 @@ def get_app_model(appname, suffix=""):
 
 
 def class_load(name):
-    mod = __import__(name)
-    components = name.split('.')
-    for comp in components[1:]:
-        mod = getattr(mod, comp)
-    return mod
+    # 'package.module.Class', __import__ of the whole path fails on Class
+    module, attr = name.rsplit('.', 1)
+    return getattr(__import__(module, fromlist=[attr]), attr)
+
+
+def is_mobile(request):
+    """
+    flag set by MobileDetectionMiddleware, False outside a request
+    """
+    return bool(getattr(request, 'is_mobile', False))
+
+
+class LRUCache(object):
+    """
+    In-process mapping of at most ``maxsize`` items, the least recently
+    used is dropped first. ``hits`` and ``misses`` count the lookups.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """
+        value of ``key``, ``compute(key)`` stored on a miss
+        """
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._items[key] = value
+                return value
+
+        value = compute(key)
+        self.set(key, value)
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
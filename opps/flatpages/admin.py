@@ -3,13 +3,12 @@ from django.contrib import admin
 from django.utils.translation import ugettext_lazy as _
 from django import forms
 from django.contrib.auth import get_user_model
-from django.contrib.sites.models import Site
-from django.conf import settings
 
 from redactor.widgets import RedactorEditor
 
 from .models import FlatPage
 from opps.core.admin import apply_opps_rules
+from opps.core.sites import get_request_site
 from opps.images.generate import image_url
 
 
@@ -49,7 +48,7 @@ class FlatPageAdmin(admin.ModelAdmin):
     def save_model(self, request, obj, form, change):
         if getattr(obj, 'pk', None) is None:
             obj.user = get_user_model().objects.get(pk=request.user.pk)
-            obj.site = Site.objects.get(pk=settings.SITE_ID)
+            obj.site = get_request_site(request)
         obj.save()
 
 admin.site.register(FlatPage, FlatPageAdmin)
@@ -1,7 +1,8 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 from django.conf.urls import patterns, url
-from django.views.decorators.cache import cache_page
+
+from opps.core.decorators import cache_page
 
 from .views import PageDetail
 
@@ -11,5 +12,5 @@ urlpatterns = patterns(
 
     # FLATPAGEs
     url(r'^(?P<slug>[\w]+)$',
-        cache_page(60 * 2)(PageDetail.as_view()), name='open'),
+        cache_page('flatpage')(PageDetail.as_view()), name='open'),
 )
@@ -1,9 +1,10 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 from django.views.generic.detail import DetailView
-from django.contrib.sites.models import get_current_site
 from django.utils import timezone
 
+from opps.core.sites import get_request_site
+
 from .models import FlatPage
 
 
@@ -25,7 +26,7 @@ class PageDetail(DetailView):
 
     @property
     def queryset(self):
-        self.site = get_current_site(self.request)
+        self.site = get_request_site(self.request)
         self.slug = self.kwargs.get('slug')
 
         self.page = self.model.objects.filter(
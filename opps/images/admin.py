@@ -2,7 +2,6 @@
 from django.contrib import admin
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.auth import get_user_model
-from django.contrib.sites.models import get_current_site
 from django.contrib.admin import SimpleListFilter
 
 from .models import Image
@@ -10,6 +9,7 @@ from .forms import ImageModelForm
 from .generate import image_url
 from opps.core.admin import PublishableAdmin
 from opps.core.admin import apply_opps_rules
+from opps.core.sites import get_request_site
 
 User = get_user_model()
 
@@ -79,7 +79,7 @@ class ImagesAdmin(PublishableAdmin):
     def save_model(self, request, obj, form, change):
         if not change and len(form.more_image()) >= 1:
             [Image.objects.create(
-                site=get_current_site(request),
+                site=get_request_site(request),
                 image=img,
                 title=obj.title,
                 slug=u"{0}-{1}".format(obj.slug, i),
@@ -1,14 +1,12 @@
 # -*- coding: utf-8 -*-
 from django.contrib.sitemaps import GenericSitemap as DjangoGenericSitemap
 from django.contrib.sitemaps import Sitemap as DjangoSitemap
-from django.utils import timezone
 
 from opps.articles.models import Article
 
 
 def InfoDisct(googlenews=False):
-    article = Article.objects.filter(date_available__lte=timezone.now(),
-                                     published=True)
+    article = Article.objects.filter(**Article.visible_lookups())
     if googlenews:
         article = article[:1000]
     return {
@@ -21,8 +19,7 @@ class BaseSitemap(DjangoSitemap):
     priority = 0.6
 
     def items(self):
-        return Article.objects.filter(date_available__lte=timezone.now(),
-                                      published=True)
+        return Article.objects.filter(**Article.visible_lookups())
 
     def lastmod(self, obj):
         return obj.date_available